@@ -3,12 +3,15 @@ HealFlow Backend - New Implementation
 Flask API with Gemini AI Integration
 """
 
-from flask import Flask, jsonify, request, abort
+from flask import Flask, jsonify, request, abort, Response, stream_with_context, make_response
 from flask_cors import CORS
 from dotenv import load_dotenv
+import functools
 import os
 import random
+import zlib
 import threading
+import time
 from datetime import datetime, timedelta
 import json
 
@@ -17,27 +20,88 @@ load_dotenv()
 
 # Import local modules
 import database as db
-from config import get_ui_labels, get_system_config, get_ooda_stages, RISK_THRESHOLDS
+import jobs
+import llm
+import workers
+from config import get_ui_labels, get_system_config, get_ooda_stages, RISK_THRESHOLDS, STREAM_CONFIG, ETAG_CONFIG, PAGINATION_CONFIG, INGEST_CONFIG, JOB_CONFIG, WORKER_CONFIG, SERVER_CONFIG, TIMESERIES_CONFIG, AUDIT_ARCHIVE_CONFIG
 
 # Initialize Flask app
 app = Flask(__name__)
 CORS(app, resources={r"/api/*": {"origins": "*"}})
 
-# Gemini AI Setup
-GEMINI_AVAILABLE = False
-genai_client = None
-
-try:
-    from google import genai
-    GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-    if GEMINI_API_KEY:
-        genai_client = genai.Client(api_key=GEMINI_API_KEY)
-        GEMINI_AVAILABLE = True
-        print("✅ Gemini AI configured successfully")
-    else:
-        print("⚠️ GEMINI_API_KEY not found")
-except ImportError:
-    print("⚠️ google-genai not installed")
+
+@app.before_request
+def ensure_database():
+    """Initialize the database on the first request when startup didn't"""
+    db.ensure_initialized()
+
+
+# OODA stage ids in execution order
+OODA_STAGE_IDS = [stage["id"] for stage in sorted(get_ooda_stages(), key=lambda stage: stage["order"])]
+
+# Keys (and types) each stage's output must carry, as _generate_fallback produces
+OODA_STAGE_SCHEMAS = {
+    'observe': {'findings': list},
+    'orient': {'context': str, 'related': list},
+    'decide': {'chain_of_thought': list, 'proposed_solution': dict},
+    'act': {'actions': list},
+}
+
+# Returned when the system_status table has not been initialized
+DEFAULT_SYSTEM_STATUS = {
+    "status": "nominal",
+    "active_nodes": 42,
+    "active_agents": 12,
+    "uptime": 99.998,
+    "latency": 42,
+    "version": "CMD_V1.0.0"
+}
+
+
+# ==================== CONDITIONAL GET ====================
+
+def conditional_get(*entity_types):
+    """Answer 304 Not Modified when the client's ETag still matches the
+    change versions of the entity types the endpoint reads. The check runs
+    before the view, so unchanged polls only read the version counters."""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            etag = _current_etag(entity_types)
+            if request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag, weak=True)
+            # Let browsers keep the body but revalidate on every request
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
+
+
+def _current_etag(entity_types):
+    """Build an ETag from change versions, the query string and, for
+    time-windowed queries, the current time bucket"""
+    parts = [db.get_change_versions(*entity_types), request.path, request.query_string.decode()]
+    if request.args.get('time_period'):
+        parts.append(str(int(time.time() // ETAG_CONFIG['time_window_bucket_seconds'])))
+    return f"{parts[0]}-{zlib.crc32('|'.join(parts[1:]).encode()):08x}"
+
+
+# ==================== PAGINATION ====================
+
+def _page_args():
+    """Read limit, cursor and count mode for a keyset-paginated list"""
+    limit = min(int(request.args.get('limit', 50)), PAGINATION_CONFIG['max_limit'])
+    if limit < 1:
+        abort(400, description="limit must be at least 1")
+    count_mode = request.args.get('count', PAGINATION_CONFIG['default_count_mode'])
+    if count_mode not in ('exact', 'approx', 'none'):
+        abort(400, description="count must be one of: exact, approx, none")
+    return limit, request.args.get('cursor'), count_mode
 
 
 # ==================== API ROUTES ====================
@@ -46,11 +110,14 @@ except ImportError:
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
+    """Health check endpoint. Doesn't load the LLM client: configured and
+    breaker not open counts as available."""
+    breaker_state = llm.get_client_stats()["breaker"]["state"]
     return jsonify({
         "status": "healthy",
         "timestamp": datetime.utcnow().isoformat(),
-        "gemini_available": GEMINI_AVAILABLE,
+        "gemini_available": llm.is_configured() and breaker_state != "open",
+        "llm_breaker": breaker_state,
         "version": get_system_config()["version"]
     })
 
@@ -80,18 +147,12 @@ def get_system_status():
     """Get current system status"""
     status = db.get_system_status()
     if not status:
-        return jsonify({
-            "status": "nominal",
-            "active_nodes": 42,
-            "active_agents": 12,
-            "uptime": 99.998,
-            "latency": 42,
-            "version": "CMD_V1.0.0"
-        })
+        return jsonify(DEFAULT_SYSTEM_STATUS)
     return jsonify(status)
 
 
 @app.route('/api/system/metrics', methods=['GET'])
+@conditional_get('signals', 'merchants')
 def get_metrics():
     """Get current system metrics"""
     period = request.args.get('period', 'day')
@@ -119,6 +180,48 @@ def get_metrics():
     return jsonify(metrics)
 
 
+@app.route('/api/system/metrics/cache', methods=['GET'])
+def get_metrics_cache_stats():
+    """Get metrics cache hit/miss counters"""
+    return jsonify(db.get_metrics_cache_stats())
+
+
+@app.route('/api/system/llm-cache', methods=['GET'])
+def get_llm_cache_stats():
+    """Get LLM response cache hit rate and saved latency"""
+    return jsonify(llm.get_cache_stats())
+
+
+@app.route('/api/system/llm', methods=['GET'])
+def get_llm_client_stats():
+    """Get LLM breaker state, call counters and latency histogram"""
+    return jsonify(llm.get_client_stats())
+
+
+@app.route('/api/system/llm-batches', methods=['GET'])
+def get_llm_batch_stats():
+    """Get LLM micro-batching counters"""
+    return jsonify(llm.get_batch_stats())
+
+
+@app.route('/api/system/workers', methods=['GET'])
+def get_worker_stats():
+    """Get this process's auto-resolution workers and the shared stale backlog"""
+    return jsonify({**workers.get_stats(), "config": WORKER_CONFIG})
+
+
+@app.route('/api/system/audit-archive', methods=['GET'])
+def get_audit_archive_stats():
+    """Get hot audit rows and the archive segment index"""
+    return jsonify(db.get_audit_archive_stats())
+
+
+@app.route('/api/system/ingest', methods=['GET'])
+def get_ingest_stats():
+    """Get write-behind ingestion queue depth and commit counters"""
+    return jsonify(db.get_ingest_stats())
+
+
 @app.route('/api/system/metrics/history', methods=['GET'])
 def get_metrics_history():
     """Get historical metrics"""
@@ -128,12 +231,42 @@ def get_metrics_history():
     return jsonify({"data": history})
 
 
+# ---------- Dashboard ----------
+
+@app.route('/api/dashboard/snapshot', methods=['GET'])
+@conditional_get('signals', 'merchants', 'system_status', 'agents', 'hil_requests')
+def get_dashboard_snapshot():
+    """Get metrics, status, signals, agents and HIL queue in one round trip"""
+    limit = int(request.args.get('limit', 50))
+    tier_param = request.args.get('tier')
+    tiers = tier_param.split(',') if tier_param else None
+    phase = request.args.get('phase')
+    time_period = request.args.get('time_period')
+    
+    snapshot = db.get_dashboard_snapshot(tier=tiers, phase=phase, time_period=time_period, limit=limit)
+    signals, signals_pagination = snapshot["signals"]
+    hil_requests = snapshot["hil_requests"]
+    
+    return jsonify({
+        "generated_at": datetime.utcnow().isoformat(),
+        "metrics": snapshot["metrics"],
+        "system_status": snapshot["system_status"] or DEFAULT_SYSTEM_STATUS,
+        "signals": {
+            "data": signals,
+            "pagination": signals_pagination
+        },
+        "agents": {"data": snapshot["agents"]},
+        "hil_requests": {"data": hil_requests, "count": len(hil_requests)}
+    })
+
+
 # ---------- Signals ----------
 
 @app.route('/api/signals', methods=['GET'])
+@conditional_get('signals', 'merchants')
 def get_signals():
     """Get all signals with optional filtering"""
-    limit = int(request.args.get('limit', 50))
+    limit, cursor, count_mode = _page_args()
     status = request.args.get('status')
     severity = request.args.get('severity')
     phase = request.args.get('phase')
@@ -143,23 +276,23 @@ def get_signals():
     tier_param = request.args.get('tier')
     tiers = tier_param.split(',') if tier_param else None
     
-    signals = db.get_all_signals(
-        limit=limit, 
-        status=status, 
-        severity=severity,
-        tier=tiers,
-        phase=phase,
-        time_period=time_period
-    )
+    try:
+        signals, pagination = db.get_signals_page(
+            limit=limit, 
+            status=status, 
+            severity=severity,
+            tier=tiers,
+            phase=phase,
+            time_period=time_period,
+            page_cursor=cursor,
+            count_mode=count_mode
+        )
+    except ValueError as e:
+        abort(400, description=str(e))
     
     return jsonify({
         "data": signals,
-        "pagination": {
-            "total": len(signals),
-            "limit": limit,
-            "offset": 0,
-            "hasMore": False
-        }
+        "pagination": pagination
     })
 
 
@@ -172,23 +305,33 @@ def get_signal(signal_id):
     return jsonify(signal)
 
 
-@app.route('/api/signals', methods=['POST'])
-def create_signal():
-    """Create a new signal"""
-    data = request.get_json()
-    
+def _validate_signal(data):
+    """Return the validation error for a new signal, or None if it is valid"""
     if not data:
-        abort(400, description="Request body is required")
+        return "Request body is required"
+    if not isinstance(data, dict):
+        return "Signal must be a JSON object"
     
     required_fields = ['type', 'severity', 'source']
     for field in required_fields:
         if field not in data:
-            abort(400, description=f"Field '{field}' is required")
+            return f"Field '{field}' is required"
     
     # Validate severity
     valid_severities = ['CRITICAL', 'ERROR', 'WARN', 'INFO', 'SYSTEM']
     if data.get('severity') not in valid_severities:
-        abort(400, description=f"Severity must be one of: {valid_severities}")
+        return f"Severity must be one of: {valid_severities}"
+    return None
+
+
+@app.route('/api/signals', methods=['POST'])
+def create_signal():
+    """Create a new signal"""
+    data = request.get_json()
+    
+    error = _validate_signal(data)
+    if error:
+        abort(400, description=error)
     
     signal = db.create_signal(data)
     db.log_audit('create', 'signal', signal['id'], details=data)
@@ -196,6 +339,39 @@ def create_signal():
     return jsonify(signal), 201
 
 
+@app.route('/api/signals/batch', methods=['POST'])
+def create_signals_batch():
+    """Create many signals in one transaction. Invalid items are rejected
+    individually; the rest are inserted. Body: {"signals": [...]} or a list."""
+    data = request.get_json()
+    signals = data.get('signals') if isinstance(data, dict) else data
+    
+    if not isinstance(signals, list) or not signals:
+        abort(400, description="A non-empty 'signals' list is required")
+    max_batch_size = INGEST_CONFIG['max_batch_size']
+    if len(signals) > max_batch_size:
+        abort(400, description=f"At most {max_batch_size} signals per batch")
+    
+    results = [None] * len(signals)
+    valid = []
+    for index, item in enumerate(signals):
+        error = _validate_signal(item)
+        if error:
+            results[index] = {"index": index, "status": "rejected", "error": error}
+        else:
+            valid.append((index, item))
+    
+    signal_ids = db.create_signals_batch([item for _, item in valid])
+    for (index, _), signal_id in zip(valid, signal_ids):
+        results[index] = {"index": index, "status": "created", "id": signal_id}
+    
+    return jsonify({
+        "created": len(signal_ids),
+        "rejected": len(signals) - len(signal_ids),
+        "results": results
+    }), 201 if signal_ids else 400
+
+
 @app.route('/api/signals/<signal_id>', methods=['PUT', 'PATCH'])
 def update_signal(signal_id):
     """Update a signal status"""
@@ -250,6 +426,7 @@ def generate_signal():
 # ---------- Agents ----------
 
 @app.route('/api/agents', methods=['GET'])
+@conditional_get('agents')
 def get_agents():
     """Get all agents"""
     status = request.args.get('status')
@@ -344,22 +521,53 @@ def start_ooda_process():
 
 @app.route('/api/ooda/step', methods=['POST'])
 def advance_ooda_step():
-    """Advance OODA process by one step"""
-    data = request.get_json()
+    """Advance OODA process by one step. With "async": true the step runs on
+    the job pool and the response is 202 with a job to poll or wait for
+    on the stream (job.succeeded / job.failed)."""
+    return _dispatch_ooda('ooda_step', _run_ooda_step)
+
+
+@app.route('/api/ooda/run', methods=['POST'])
+def run_ooda_pipeline():
+    """Run every remaining OODA stage from a single LLM call and record them
+    together. Accepts "async": true like /api/ooda/step."""
+    return _dispatch_ooda('ooda_pipeline', _run_ooda_pipeline)
+
+
+def _dispatch_ooda(job_type, runner):
+    """Run runner(process_id) inline, or on the job pool when asked to"""
+    data = request.get_json() or {}
     process_id = data.get('process_id')
     
     if not process_id:
         abort(400, description="process_id is required")
     
-    process = db.get_ooda_process(process_id)
-    if not process:
+    if not db.get_ooda_process(process_id):
         abort(404, description="OODA process not found")
     
+    if not data.get('async', JOB_CONFIG['ooda_step_async']):
+        return jsonify(runner(process_id))
+    
+    try:
+        # One step or pipeline at a time per process: a repeat submit gets the same job
+        job = jobs.submit(job_type, runner, process_id, key=f"ooda:{process_id}")
+    except jobs.JobQueueFull as e:
+        abort(503, description=str(e))
+    
+    response = jsonify({"job": job})
+    response.status_code = 202
+    response.headers['Location'] = f"/api/jobs/{job['id']}"
+    return response
+
+
+def _run_ooda_step(process_id):
+    """Run the current stage of an OODA process and return the step result"""
+    process = db.get_ooda_process(process_id)
     signal = db.get_signal(process['signal_id'])
     agent = db.get_agent(process['agent_id'])
     
     # Determine current and next stage
-    stages = ['observe', 'orient', 'decide', 'act']
+    stages = OODA_STAGE_IDS
     current_stage = None
     
     for stage in stages:
@@ -376,28 +584,13 @@ def advance_ooda_step():
                 break
     
     if not current_stage:
-        return jsonify({"message": "OODA process already complete", "process": process})
+        return {"message": "OODA process already complete", "process": process}
     
     # Generate stage output using Gemini or fallback
     stage_output = _generate_stage_output(current_stage, signal, process)
     
     # Update process with stage completion
-    updates = {
-        f'{current_stage}_status': 'complete',
-        f'{current_stage}_completed_at': datetime.utcnow().isoformat()
-    }
-    
-    if current_stage == 'observe':
-        updates['observe_findings'] = stage_output.get('findings', [])
-    elif current_stage == 'orient':
-        updates['orient_context'] = stage_output.get('context', '')
-        updates['orient_related_incidents'] = stage_output.get('related', [])
-    elif current_stage == 'decide':
-        updates['decide_chain_of_thought'] = stage_output.get('chain_of_thought', [])
-        updates['decide_proposed_solution'] = stage_output.get('proposed_solution', {})
-    elif current_stage == 'act':
-        updates['act_actions'] = stage_output.get('actions', [])
-        updates['completed_at'] = datetime.utcnow().isoformat()
+    updates = _stage_updates(current_stage, stage_output)
     
     # Activate next stage
     stage_idx = stages.index(current_stage)
@@ -413,26 +606,116 @@ def advance_ooda_step():
         })
     else:
         # Process complete
-        db.update_agent(agent['id'], {
-            'status': 'idle',
-            'current_task_signal_id': None,
-            'current_task_stage': None,
-            'current_task_progress': 0
-        })
+        db.update_agent(agent['id'], _agent_idle_updates())
         db.update_signal(process['signal_id'], {'status': 'resolved'})
     
     db.update_ooda_process(process_id, updates)
     
-    return jsonify({
+    return {
         "stage_completed": current_stage,
         "output": stage_output,
         "process": db.get_ooda_process(process_id)
-    })
+    }
+
+
+def _run_ooda_pipeline(process_id):
+    """Generate every remaining stage in one LLM call, then record them,
+    idle the agent and resolve the signal in one transaction"""
+    process = db.get_ooda_process(process_id)
+    remaining = [stage for stage in OODA_STAGE_IDS if process.get(f'{stage}_status') != 'complete']
+    if not remaining:
+        return {"message": "OODA process already complete", "process": process}
+    
+    outputs = _generate_pipeline_output(db.get_signal(process['signal_id']))
+    
+    updates = {}
+    for stage in remaining:
+        updates.update(_stage_updates(stage, outputs[stage]))
+    process = db.commit_ooda_stages(
+        process_id, updates,
+        agent_updates=_agent_idle_updates(),
+        signal_updates={'status': 'resolved'}
+    )
+    
+    return {
+        "stages_completed": remaining,
+        "output": {stage: outputs[stage] for stage in remaining},
+        "process": process
+    }
+
+
+def _stage_updates(stage, stage_output):
+    """ooda_processes columns recording a completed stage"""
+    updates = {
+        f'{stage}_status': 'complete',
+        f'{stage}_completed_at': datetime.utcnow().isoformat()
+    }
+    
+    if stage == 'observe':
+        updates['observe_findings'] = stage_output.get('findings', [])
+    elif stage == 'orient':
+        updates['orient_context'] = stage_output.get('context', '')
+        updates['orient_related_incidents'] = stage_output.get('related', [])
+    elif stage == 'decide':
+        updates['decide_chain_of_thought'] = stage_output.get('chain_of_thought', [])
+        updates['decide_proposed_solution'] = stage_output.get('proposed_solution', {})
+    elif stage == 'act':
+        updates['act_actions'] = stage_output.get('actions', [])
+        updates['completed_at'] = datetime.utcnow().isoformat()
+    return updates
+
+
+def _agent_idle_updates():
+    """Agent columns reset once its OODA process completes"""
+    return {
+        'status': 'idle',
+        'current_task_signal_id': None,
+        'current_task_stage': None,
+        'current_task_progress': 0
+    }
+
+
+def _validate_stage_output(stage, output):
+    """True if output has every key OODA_STAGE_SCHEMAS requires for the stage"""
+    return isinstance(output, dict) and all(
+        isinstance(output.get(key), expected) for key, expected in OODA_STAGE_SCHEMAS[stage].items()
+    )
+
+
+def _generate_pipeline_output(signal):
+    """All four stage outputs from one Gemini call. Any stage that is
+    missing or fails its schema gets the fallback output instead."""
+    outputs = {}
+    if llm.is_available():
+        try:
+            outputs = _generate_pipeline_with_gemini(signal) or {}
+        except Exception as e:
+            print(f"Gemini error: {e}")
+    
+    return {
+        stage: outputs[stage] if _validate_stage_output(stage, outputs.get(stage)) else _generate_fallback(stage, signal)
+        for stage in OODA_STAGE_IDS
+    }
+
+
+def _generate_pipeline_with_gemini(signal):
+    """Ask Gemini for the whole OODA loop in one structured response"""
+    prompt = f"""Run a complete OODA analysis (observe, orient, decide, act) of this system signal.
+Signal: {json.dumps(signal)}
+Each stage builds on the previous one. Return a single JSON object with:
+- 'observe': object with 'findings' array of 3-5 key observations
+- 'orient': object with 'context' string and 'related' array of related incident patterns
+- 'decide': object with 'chain_of_thought' array of 5 reasoning steps and 'proposed_solution'
+  object with 'type', 'description', 'confidence', 'risk_level'
+- 'act': object with 'actions' array containing action objects with 'type' and 'description'"""
+    
+    parsed = llm.extract_json(llm.generate_cached("ooda_pipeline", llm.signal_fingerprint(signal), prompt, batch=True))
+    return parsed if isinstance(parsed, dict) else None
 
 
 def _generate_stage_output(stage, signal, process):
     """Generate output for OODA stage using Gemini or fallback"""
-    if GEMINI_AVAILABLE and genai_client:
+    if llm.is_available():
         try:
             return _generate_with_gemini(stage, signal, process)
         except Exception as e:
@@ -469,21 +752,13 @@ Return JSON with 'actions' array containing action objects with 'type' and 'desc
     
     prompt = prompts.get(stage, "Analyze the signal")
     
-    response = genai_client.models.generate_content(
-        model="gemini-2.0-flash",
-        contents=prompt
-    )
-    text = response.text
+    # Concurrent stage requests share one LLM call; if the batched reply
+    # leaves this one out, BatchItemMissing sends us to the fallback
+    text = llm.generate_cached(f"ooda_{stage}", llm.signal_fingerprint(signal), prompt, batch=True)
     
-    # Try to parse JSON from response
-    try:
-        # Find JSON in response
-        start = text.find('{')
-        end = text.rfind('}') + 1
-        if start >= 0 and end > start:
-            return json.loads(text[start:end])
-    except:
-        pass
+    output = llm.extract_json(text)
+    if _validate_stage_output(stage, output):
+        return output
     
     return _generate_fallback(stage, signal)
 
@@ -536,9 +811,86 @@ def _generate_fallback(stage, signal):
     return {}
 
 
+# ---------- Live Stream ----------
+
+@app.route('/api/stream', methods=['GET'])
+def stream_events():
+    """Server-Sent Events feed of signal, agent and HIL queue changes.
+    Reconnecting clients resume from the Last-Event-ID header (or the
+    last_event_id query param); without one the stream starts from now."""
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        abort(400, description="last_event_id must be an integer")
+    
+    return Response(
+        stream_with_context(_event_stream(last_event_id)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+def _event_stream(last_event_id):
+    """Yield SSE frames for committed change events"""
+    oldest, latest = db.get_change_id_range()
+    yield f"retry: {STREAM_CONFIG['client_retry_ms']}\n\n"
+    
+    if last_event_id is None:
+        last_event_id = latest
+    elif last_event_id < oldest - 1 or last_event_id > latest:
+        # Requested position was trimmed (or belongs to another database):
+        # tell the client to reload a full snapshot and continue from here
+        yield _format_sse('reset', latest, {"latest_event_id": latest})
+        last_event_id = latest
+    
+    last_sent = time.time()
+    while True:
+        events = db.get_changes_since(last_event_id, limit=STREAM_CONFIG['batch_size'])
+        for event in events:
+            last_event_id = event['id']
+            yield _format_sse(f"{event['entity_type']}.{event['action']}", event['id'], {
+                "entity_id": event['entity_id'],
+                "timestamp": event['timestamp'],
+                "data": event['payload']
+            })
+        if events:
+            last_sent = time.time()
+            if len(events) == STREAM_CONFIG['batch_size']:
+                continue
+        
+        if not db.wait_for_changes(last_event_id, STREAM_CONFIG['poll_interval_seconds']):
+            if time.time() - last_sent >= STREAM_CONFIG['heartbeat_interval_seconds']:
+                yield ": heartbeat\n\n"
+                last_sent = time.time()
+
+
+def _format_sse(event_type, event_id, data):
+    """Format a single Server-Sent Events frame"""
+    return f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data)}\n\n"
+
+
+# ---------- Jobs ----------
+
+@app.route('/api/jobs', methods=['GET'])
+def get_job_stats():
+    """Get job pool size, queue depth and counters"""
+    return jsonify(jobs.get_stats())
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get a background job's status and, once finished, its result"""
+    job = jobs.get_job(job_id)
+    if not job:
+        abort(404, description="Job not found")
+    return jsonify(job)
+
+
 # ---------- HIL Requests ----------
 
 @app.route('/api/hil-requests', methods=['GET'])
+@conditional_get('hil_requests')
 def get_hil_requests():
     """Get all pending HIL requests"""
     status = request.args.get('status', 'pending')
@@ -703,20 +1055,21 @@ def _generate_demo_config_diff(incident_id):
 @app.route('/api/incidents', methods=['GET'])
 def get_incidents():
     """Get all incidents"""
-    limit = int(request.args.get('limit', 50))
+    limit, cursor, count_mode = _page_args()
     status = request.args.get('status')
     severity = request.args.get('severity')
     
-    incidents = db.get_all_incidents(limit=limit, status=status, severity=severity)
+    try:
+        incidents, pagination = db.get_incidents_page(
+            limit=limit, status=status, severity=severity,
+            page_cursor=cursor, count_mode=count_mode
+        )
+    except ValueError as e:
+        abort(400, description=str(e))
     
     return jsonify({
         "data": incidents,
-        "pagination": {
-            "total": len(incidents),
-            "limit": limit,
-            "offset": 0,
-            "hasMore": False
-        }
+        "pagination": pagination
     })
 
 
@@ -787,18 +1140,20 @@ def generate_brief():
         "status": "All systems operational"
     }
     
-    if GEMINI_AVAILABLE and genai_client:
+    if llm.is_available():
         try:
             prompt = f"""Generate a brief executive summary paragraph based on:
 Metrics: {json.dumps(metrics)}
 Recent incidents: {len(incidents)}
 Keep it to 2-3 sentences, professional tone."""
             
-            response = genai_client.models.generate_content(
-                model="gemini-2.0-flash",
-                contents=prompt
-            )
-            summary["ai_summary"] = response.text
+            # Whole-number metrics, so a brief is reused until they really move
+            fingerprint = {
+                "metrics": {key: round(value) if isinstance(value, (int, float)) else value
+                            for key, value in metrics.items()},
+                "recent_incidents": len(incidents)
+            }
+            summary["ai_summary"] = llm.generate_cached("brief", fingerprint, prompt)
         except Exception as e:
             print(f"Brief generation error: {e}")
     
@@ -809,9 +1164,10 @@ Keep it to 2-3 sentences, professional tone."""
 
 @app.route('/api/audit-log', methods=['GET'])
 def get_audit_log():
-    """Get audit log"""
+    """Get audit log, newest first; start/end (ISO timestamps) select a
+    range, which may reach into the archive"""
     limit = int(request.args.get('limit', 100))
-    log = db.get_audit_log(limit)
+    log = db.get_audit_log(limit, request.args.get('start'), request.args.get('end'))
     return jsonify({"data": log})
 
 
@@ -827,6 +1183,13 @@ def not_found(e):
     return jsonify({"error": "Not Found", "message": str(e.description)}), 404
 
 
+@app.errorhandler(503)
+def service_unavailable(e):
+    response = jsonify({"error": "Service Unavailable", "message": str(e.description)})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+
 @app.errorhandler(500)
 def internal_error(e):
     return jsonify({"error": "Internal Server Error", "message": str(e)}), 500
@@ -835,11 +1198,14 @@ def internal_error(e):
 # ==================== BACKGROUND TASKS ====================
 
 def _background_worker():
-    """Background task: Heartbeats + Auto-Resolution Agent"""
+    """Background task: Heartbeats, time-series compaction and audit
+    archiving (stale signals are resolved by workers.py)"""
     import time
     print("🤖 AI Background Agent started")
     
     last_heartbeat = time.time()
+    last_compaction = 0
+    last_archive = 0
     
     while True:
         try:
@@ -858,90 +1224,52 @@ def _background_worker():
                     db.create_signal(hb_signal)
                     last_heartbeat = current_time
                 
-                # 2. AUTO-RESOLVE STALE SIGNALS
-                # Find signals that are pending/processing for > 30 seconds (orphaned from frontend demo)
-                pending_signals = db.get_all_signals(limit=20, status='pending')
-                processing_signals = db.get_all_signals(limit=20, status='processing')
-                
-                all_candidates = pending_signals + processing_signals
+                # 2. TIME-SERIES DOWNSAMPLING
+                if current_time - last_compaction > TIMESERIES_CONFIG['compact_interval_seconds']:
+                    removed = db.compact_timeseries()
+                    last_compaction = current_time
+                    if any(removed.values()):
+                        print(f"📉 Downsampled time series (rows folded: {removed})")
                 
-                for sig in all_candidates:
-                    # Parse timestamp
-                    try:
-                        sig_time = datetime.fromisoformat(sig['timestamp'])
-                        # If older than 45 seconds, AI takes over
-                        if (datetime.utcnow() - sig_time).total_seconds() > 45:
-                            print(f"🤖 AI Agent auto-resolving stale signal: {sig['type']}")
-                            
-                            # Determine resolution based on severity
-                            resolution_notes = "Auto-resolved by Background AI Agent"
-                            
-                            if sig['severity'] == 'CRITICAL':
-                                # For critical, we might verify if it's already in HIL
-                                # But per user request "should get complete", we'll resolve it
-                                # assuming the "human" is absent (frontend closed).
-                                resolution_notes += " (Emergency Protocol)"
-                                
-                            # Mark as resolved
-                            db.update_signal(sig['id'], {
-                                'status': 'resolved',
-                                'agent_id': 'agent_background_ai',
-                                'metadata': {
-                                    **sig.get('metadata', {}),
-                                    'resolution': resolution_notes,
-                                    'resolved_by': 'HealFlow_Auto_GBK'
-                                }
-                            })
-                            
-                            # Create an incident record for it to show "work done"
-                            merchant_id = sig.get('merchant_id') or 'merch_default'
-                            db.get_connection().execute('''
-                                INSERT INTO incidents (
-                                    id, signal_id, merchant_id, type, title, description, severity, status,
-                                    detected_at, resolved_at, resolution_time, resolution_type, revenue_protected, created_at
-                                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                            ''', (
-                                db.generate_id('inc_auto_'), 
-                                sig['id'], 
-                                merchant_id, 
-                                sig['type'], 
-                                f"Auto-Resolved: {sig['type']}", 
-                                resolution_notes, 
-                                sig['severity'].lower(), 
-                                'resolved', 
-                                sig['timestamp'], 
-                                datetime.utcnow().isoformat(), 
-                                45, 
-                                'auto_fixed', 
-                                random.randint(1000, 50000), 
-                                datetime.utcnow().isoformat()
-                            ))
-                            db.get_connection().commit()
-                            
-                    except Exception as e:
-                        print(f"Error processing signal {sig['id']}: {e}")
+                # 3. AUDIT LOG ARCHIVING
+                if current_time - last_archive > AUDIT_ARCHIVE_CONFIG['archive_interval_seconds']:
+                    archived = db.archive_audit_log()
+                    last_archive = current_time
+                    if archived["rows"]:
+                        print(f"🗄️ Archived {archived['rows']} audit rows to {', '.join(archived['segments'])}")
             
             # Sleep briefly
-            time.sleep(10)
+            time.sleep(WORKER_CONFIG['interval_seconds'])
                 
         except Exception as e:
             print(f"Background worker error: {e}")
-            time.sleep(10)
+            time.sleep(WORKER_CONFIG['interval_seconds'])
+
+
+def start_background_tasks():
+    """Start the heartbeat thread and the embedded worker pool. Runs in one
+    process only: the dev server's reloaded child, or serve.py's elected worker."""
+    worker_thread = threading.Thread(target=_background_worker, daemon=True)
+    worker_thread.start()
+    # Signals left pending/processing (orphaned from the frontend demo)
+    # are leased and resolved by the worker pool
+    if WORKER_CONFIG['embedded']:
+        workers.start()
 
 # ==================== MAIN ====================
 
 if __name__ == '__main__':
     print("\n🚀 HealFlow Backend Starting...")
-    print(f"   Gemini AI: {'✅ Enabled' if GEMINI_AVAILABLE else '⚠️ Disabled'}")
+    print(f"   Gemini AI: {'✅ Enabled (loads on first use)' if llm.is_configured() else '⚠️ Disabled'} [backend: {llm.LLM_BACKEND}]")
     print(f"   Database: {db.DATABASE_PATH}")
     
-    # Initialize DB (which refreshes timestamps)
-    db.init_database()
+    # Initialize DB (which advances the data clock after downtime)
+    db.ensure_initialized()
     
     # Start background worker (only if main process)
     if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
-        worker_thread = threading.Thread(target=_background_worker, daemon=True)
-        worker_thread.start()
+        start_background_tasks()
     
+    # Development server; use serve.py in production
     print("\n")
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    app.run(host='0.0.0.0', port=int(os.getenv('HEALFLOW_PORT') or SERVER_CONFIG['port']), debug=True)
@@ -0,0 +1,37 @@
+"""
+Helpers shared by the benchmark scripts: latency percentiles and temporary
+copies of healflow.db, so benchmarks never touch the real database.
+"""
+
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_DB = os.path.join(BACKEND_DIR, 'healflow.db')
+
+
+def percentile(timings, fraction, digits=1):
+    """Nearest-rank percentile of timings (any order), rounded; None if empty"""
+    if not timings:
+        return None
+    timings = sorted(timings)
+    return round(timings[max(int(len(timings) * fraction) - 1, 0)], digits)
+
+
+@contextmanager
+def temp_database(source=SOURCE_DB, export=False, prefix='healflow_bench_'):
+    """Yield the path of a temporary copy of source (a new, empty path if
+    source is None or missing) and delete it afterwards. export=True also
+    points HEALFLOW_DB_PATH at it, for database.py imported after this."""
+    workdir = tempfile.mkdtemp(prefix=prefix)
+    db_path = os.path.join(workdir, 'healflow.db')
+    try:
+        if source and os.path.exists(source):
+            shutil.copy(source, db_path)
+        if export:
+            os.environ['HEALFLOW_DB_PATH'] = db_path
+        yield db_path
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
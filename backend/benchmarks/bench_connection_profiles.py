@@ -0,0 +1,102 @@
+"""
+SQLite connection profile benchmark
+Measures read and write throughput for each SQLITE_PROFILES entry while
+reader threads poll the dashboard queries and a writer inserts signals
+
+Usage: python benchmarks/bench_connection_profiles.py [--profiles legacy,durable,balanced,fast]
+                                                      [--readers 4] [--seconds 5]
+Each profile runs in its own process against a fresh temporary copy of
+healflow.db, so the real database (and its journal mode) is untouched.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from _common import BACKEND_DIR, percentile, temp_database
+
+sys.path.insert(0, BACKEND_DIR)
+
+
+def _run_profile(readers, seconds):
+    """Worker process body: database.py has already picked up the profile
+    from HEALFLOW_DB_PROFILE"""
+    import database as db
+    db.ensure_initialized()
+
+    stop = threading.Event()
+    read_timings = []
+    write_timings = []
+    errors = []
+
+    def reader():
+        timings = []
+        try:
+            while not stop.is_set():
+                start = time.perf_counter()
+                db.get_dashboard_snapshot(time_period='24h')
+                db.get_signals_page(limit=50, status='resolved')
+                timings.append((time.perf_counter() - start) * 1000)
+        except Exception as e:
+            errors.append(repr(e))
+        read_timings.extend(timings)
+
+    def writer():
+        try:
+            while not stop.is_set():
+                start = time.perf_counter()
+                db.create_signal({"type": "BENCH_SIGNAL", "severity": "WARN", "source": "Benchmark"})
+                write_timings.append((time.perf_counter() - start) * 1000)
+        except Exception as e:
+            errors.append(repr(e))
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)] + [threading.Thread(target=writer)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    return {
+        "settings": db.get_connection_settings(),
+        "reads_per_second": round(len(read_timings) / seconds, 1),
+        "read_p95_ms": percentile(read_timings, 0.95, 3),
+        "writes_per_second": round(len(write_timings) / seconds, 1),
+        "write_p95_ms": percentile(write_timings, 0.95, 3),
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--profiles', default='legacy,durable,balanced,fast')
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(_run_profile(args.readers, args.seconds)))
+        return
+
+    results = {"readers": args.readers, "seconds": args.seconds}
+    for profile in args.profiles.split(','):
+        with temp_database() as db_path:
+            env = dict(os.environ, HEALFLOW_DB_PATH=db_path, HEALFLOW_DB_PROFILE=profile)
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--worker',
+                 '--readers', str(args.readers), '--seconds', str(args.seconds)],
+                env=env, cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+            ).stdout
+            # database.py prints startup notes; the result is the last line
+            results[profile] = json.loads(output.strip().splitlines()[-1])
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
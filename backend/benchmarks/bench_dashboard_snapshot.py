@@ -0,0 +1,105 @@
+"""
+Dashboard refresh benchmark
+Compares the five-call polling pattern against /api/dashboard/snapshot
+
+Usage: python benchmarks/bench_dashboard_snapshot.py [--iterations 200] [--extra-signals 5000]
+Runs against a temporary copy of healflow.db so the real database is untouched.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+
+from _common import BACKEND_DIR, percentile, temp_database
+
+sys.path.insert(0, BACKEND_DIR)
+
+FILTER_QUERY = "tier=enterprise,mid_market,sme&phase=all&time_period=24h&limit=50"
+
+FIVE_CALLS = [
+    f"/api/system/metrics?{FILTER_QUERY}",
+    "/api/system/status",
+    f"/api/signals?{FILTER_QUERY}",
+    "/api/agents",
+    "/api/hil-requests",
+]
+
+SNAPSHOT_CALL = [f"/api/dashboard/snapshot?{FILTER_QUERY}"]
+
+
+def _pad_signals(db, count):
+    """Insert extra resolved signals so the filters have something to scan"""
+    import random
+    from datetime import datetime, timedelta
+
+    with db.get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id FROM merchants")
+        merchant_ids = [row[0] for row in cursor.fetchall()]
+        now = datetime.utcnow()
+        rows = []
+        for _ in range(count):
+            ts = (now - timedelta(minutes=random.randint(0, 60 * 24 * 30))).isoformat()
+            rows.append((
+                db.generate_id('sig_'), ts,
+                random.choice(['CRITICAL', 'ERROR', 'WARN', 'INFO', 'SYSTEM']),
+                'BENCH_SIGNAL', 'Benchmark', '/bench',
+                random.choice(['resolved', 'resolved', 'resolved', 'pending']),
+                random.choice(merchant_ids) if merchant_ids else None, ts
+            ))
+        cursor.executemany('''
+            INSERT INTO signals (id, timestamp, severity, type, source, endpoint, status, merchant_id, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        db._rebuild_signal_rollups(cursor)
+
+
+def _run(client, urls, iterations):
+    """Time one full dashboard refresh (all urls) per iteration"""
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        for url in urls:
+            response = client.get(url)
+            assert response.status_code == 200, (url, response.status_code)
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "requests_per_refresh": len(urls),
+        "mean_ms": round(statistics.mean(timings), 3),
+        "p50_ms": percentile(timings, 0.50, 3),
+        "p95_ms": percentile(timings, 0.95, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--extra-signals', type=int, default=5000)
+    args = parser.parse_args()
+
+    with temp_database(export=True):
+        import database as db
+        from app import app
+        db.ensure_initialized()
+
+        if args.extra_signals:
+            _pad_signals(db, args.extra_signals)
+
+        client = app.test_client()
+        # Warm up connections and the page cache
+        _run(client, FIVE_CALLS + SNAPSHOT_CALL, 5)
+
+        results = {
+            "iterations": args.iterations,
+            "extra_signals": args.extra_signals,
+            "five_calls": _run(client, FIVE_CALLS, args.iterations),
+            "snapshot": _run(client, SNAPSHOT_CALL, args.iterations),
+        }
+        results["speedup_p50"] = round(results["five_calls"]["p50_ms"] / results["snapshot"]["p50_ms"], 2)
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,248 @@
+"""
+Database layer benchmark suite
+Builds databases at production-like volumes with generate_data.py and times
+the public database.py read functions across the filter combinations the
+API uses, plus the common writes, emitting JSON that can be diffed between
+versions
+
+Usage: python benchmarks/bench_database.py [--scales 10k,1m,10m] [--repeat 5]
+                                           [--db-dir DIR] [--output results.json]
+                                           [--compare baseline.json] [--threshold 1.25]
+Each scale is built in (and timed from) its own process. Built databases go
+in a temporary directory, or are kept in --db-dir and reused by later runs
+(a 10m database takes a few minutes to build). With --compare, cases slower
+than threshold x the baseline (best of --repeat runs) are listed and the
+exit status is non-zero.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from _common import BACKEND_DIR, percentile
+
+sys.path.insert(0, BACKEND_DIR)
+
+from generate_data import generate, parse_count
+
+# Filter values the API passes through to database.py
+FILTER_STATUSES = [None, 'pending', 'resolved']
+FILTER_SEVERITIES = [None, 'CRITICAL']
+FILTER_TIERS = [None, ['enterprise'], ['enterprise', 'mid_market', 'sme']]
+FILTER_PHASES = [None, 'migration']
+FILTER_TIME_PERIODS = [None, '24h', '7d', '30d']
+
+
+# ==================== BUILD ====================
+
+def table_counts(db):
+    with db.get_db() as conn:
+        return {table: conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                for table in ('merchants', 'signals', 'incidents', 'ooda_processes', 'hil_requests',
+                              'audit_log', 'revenue_at_risk', 'metrics')}
+
+
+# ==================== CASES ====================
+
+def _label(name, **filters):
+    shown = ' '.join(f"{key}={','.join(value) if isinstance(value, list) else value}"
+                     for key, value in filters.items() if value is not None)
+    return f"{name} {shown}".strip()
+
+
+def iter_cases(db):
+    """Yield (label, callable) for every timed call"""
+    for status, severity, tier, time_period in itertools.product(
+            FILTER_STATUSES, FILTER_SEVERITIES, FILTER_TIERS, FILTER_TIME_PERIODS):
+        filters = dict(status=status, severity=severity, tier=tier, time_period=time_period)
+        yield _label('get_all_signals', **filters), lambda f=filters: db.get_all_signals(limit=50, **f)
+
+    for status, time_period, count_mode in itertools.product(
+            FILTER_STATUSES, [None, '24h'], ['exact', 'approx', 'none']):
+        filters = dict(status=status, time_period=time_period, count_mode=count_mode)
+        yield _label('get_signals_page', **filters), lambda f=filters: db.get_signals_page(limit=50, **f)
+    # Deep keyset page: continue from the 50th signal
+    first_page = db.get_signals_page(limit=50, count_mode='none')[1]
+    yield ('get_signals_page cursor=page2',
+           lambda: db.get_signals_page(limit=50, page_cursor=first_page['nextCursor'], count_mode='none'))
+
+    for tier, phase, time_period in itertools.product(FILTER_TIERS, FILTER_PHASES, FILTER_TIME_PERIODS):
+        filters = dict(tier=tier, phase=phase, time_period=time_period)
+        # cold: metrics cache cleared first, so the rollup queries run every time
+        yield (_label('get_current_metrics cache=cold', **filters),
+               lambda f=filters: (db._clear_metrics_cache(), db.get_current_metrics(**f)))
+    yield 'get_current_metrics cache=warm', lambda: db.get_current_metrics(time_period='24h')
+
+    for status, severity in itertools.product([None, 'detected', 'resolved'], [None, 'critical']):
+        filters = dict(status=status, severity=severity)
+        yield _label('get_all_incidents', **filters), lambda f=filters: db.get_all_incidents(limit=50, **f)
+        yield (_label('get_incidents_page count=exact', **filters),
+               lambda f=filters: db.get_incidents_page(limit=50, count_mode='exact', **f))
+    yield 'get_critical_interventions', lambda: db.get_critical_interventions()
+
+    for limit in (100, 1000):
+        yield f"get_audit_log limit={limit}", lambda limit=limit: db.get_audit_log(limit)
+    for hours in (24, 168, 720):
+        yield f"get_revenue_at_risk_data hours={hours}", lambda hours=hours: db.get_revenue_at_risk_data(hours)
+    yield 'get_metrics_history period=day', lambda: db.get_metrics_history('day', 30)
+    yield 'get_resolution_stats', lambda: db.get_resolution_stats()
+    yield 'get_system_status', lambda: db.get_system_status()
+    yield 'get_all_agents', lambda: db.get_all_agents()
+    yield 'get_pending_hil_requests', lambda: db.get_pending_hil_requests()
+    yield 'get_ghost_mitigations', lambda: db.get_ghost_mitigations()
+    yield 'get_change_versions', lambda: db.get_change_versions()
+    yield ('get_dashboard_snapshot tier=enterprise,mid_market,sme time_period=24h',
+           lambda: (db._clear_metrics_cache(),
+                    db.get_dashboard_snapshot(tier=['enterprise', 'mid_market', 'sme'], time_period='24h')))
+
+    # Writes (they add a few BENCH_WRITE rows to the database)
+    signal_id = db.get_all_signals(limit=1, status='resolved')[0]['id']
+    yield 'get_signal', lambda: db.get_signal(signal_id)
+    yield 'create_signal', lambda: db.create_signal({"type": "BENCH_WRITE", "severity": "WARN", "source": "Benchmark"})
+    yield ('create_signals_batch size=100',
+           lambda: db.create_signals_batch([{"type": "BENCH_WRITE", "severity": "INFO", "source": "Benchmark"}] * 100))
+    yield 'update_signal', lambda: db.update_signal(signal_id, {'status': 'resolved'})
+    yield 'log_audit', lambda: db.log_audit('bench', 'signal', signal_id)
+
+
+def _row_count(result):
+    if isinstance(result, tuple):
+        result = result[-1] if not isinstance(result[0], list) else result[0]
+    if isinstance(result, dict) and isinstance(result.get('data'), list):
+        return len(result['data'])
+    return len(result) if isinstance(result, list) else None
+
+
+def time_cases(db, repeat):
+    results = {}
+    for label, call in iter_cases(db):
+        call()  # warm the page cache and statement cache
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = call()
+            timings.append((time.perf_counter() - start) * 1000)
+        results[label] = {
+            "median_ms": round(statistics.median(timings), 3),
+            "p95_ms": percentile(timings, 0.95, 3),
+            "min_ms": round(min(timings), 3),
+            "rows": _row_count(result),
+        }
+    return results
+
+
+# ==================== RUN ====================
+
+def _run_scale(signal_count, repeat, db_path):
+    """Worker process body: database.py has picked up HEALFLOW_DB_PATH"""
+    build_seconds = None
+    fresh = not os.path.exists(db_path)
+    start = time.perf_counter()
+    import database as db
+    db.ensure_initialized()
+    init_seconds = time.perf_counter() - start
+    if fresh:
+        start = time.perf_counter()
+        generate(db, signal_count)
+        build_seconds = round(time.perf_counter() - start, 2)
+    return {
+        "signals_requested": signal_count,
+        "build_seconds": build_seconds,
+        "init_seconds": round(init_seconds, 3),
+        "rows": table_counts(db),
+        "db_bytes": os.path.getsize(db_path),
+        "settings": db.get_connection_settings(),
+        "cases": time_cases(db, repeat),
+    }
+
+
+def _version_info():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "timestamp": datetime.utcnow().isoformat(),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Cases whose best time got slower than threshold x the baseline's
+    (min_ms is far steadier between runs than the median)"""
+    regressions = []
+    for scale, scale_results in results["scales"].items():
+        baseline_cases = baseline.get("scales", {}).get(scale, {}).get("cases", {})
+        for label, timing in scale_results["cases"].items():
+            before = baseline_cases.get(label)
+            # Ignore differences under 0.25ms, which are timer and scheduler noise
+            if before and timing["min_ms"] > max(before["min_ms"] * threshold, before["min_ms"] + 0.25):
+                regressions.append({"scale": scale, "case": label, "baseline_ms": before["min_ms"],
+                                    "min_ms": timing["min_ms"],
+                                    "ratio": round(timing["min_ms"] / max(before["min_ms"], 1e-6), 2)})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scales', default='10k')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--db-dir', help='keep built databases here and reuse them')
+    parser.add_argument('--output', help='also write the JSON results to this file')
+    parser.add_argument('--compare', help='baseline results JSON to check for regressions')
+    parser.add_argument('--threshold', type=float, default=1.25)
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(_run_scale(parse_count(args.worker), args.repeat, os.environ['HEALFLOW_DB_PATH'])))
+        return
+
+    results = {"version": _version_info(), "repeat": args.repeat, "scales": {}}
+    workdir = args.db_dir or tempfile.mkdtemp(prefix='healflow_bench_')
+    os.makedirs(workdir, exist_ok=True)
+    try:
+        for scale in args.scales.split(','):
+            db_path = os.path.join(workdir, f"healflow_{scale}.db")
+            env = dict(os.environ, HEALFLOW_DB_PATH=db_path)
+            print(f"⏱️ {scale}: {'reusing' if os.path.exists(db_path) else 'building'} {db_path}", file=sys.stderr)
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--worker', scale, '--repeat', str(args.repeat)],
+                env=env, cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+            ).stdout
+            # database.py prints startup notes; the result is the last line
+            results["scales"][scale] = json.loads(output.strip().splitlines()[-1])
+    finally:
+        if not args.db_dir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    exit_code = 0
+    if args.compare:
+        with open(args.compare) as f:
+            results["regressions"] = compare(results, json.load(f), args.threshold)
+        exit_code = 1 if results["regressions"] else 0
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    print(text)
+    sys.exit(exit_code)
+
+
+if __name__ == '__main__':
+    main()
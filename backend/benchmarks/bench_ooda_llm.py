@@ -0,0 +1,105 @@
+"""
+OODA / brief throughput benchmark with a fake LLM
+Drives POST /api/ooda/step (every stage of many processes) and GET /api/brief
+from concurrent clients, with fake_llm.py standing in for Gemini so runs
+need no network and see realistic LLM timing
+
+Usage: python benchmarks/bench_ooda_llm.py [--processes 40] [--concurrency 8]
+                                           [--briefs 40] [--latency-median-ms 800]
+                                           [--latency-p95-ms 2500] [--error-rate 0.02]
+                                           [--cache] [--no-batch]
+The response cache is off unless --cache is given, so every stage reaches
+the (fake) LLM. Runs against a temporary copy of healflow.db so the real
+database is untouched.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from _common import BACKEND_DIR, percentile, temp_database
+
+sys.path.insert(0, BACKEND_DIR)
+
+
+def _timed(client, method, path, body=None):
+    start = time.perf_counter()
+    response = client.open(path, method=method, json=body)
+    assert response.status_code == 200, (path, response.status_code)
+    return (time.perf_counter() - start) * 1000
+
+
+def _result(timings, elapsed):
+    return {
+        "requests": len(timings),
+        "seconds": round(elapsed, 2),
+        "requests_per_second": round(len(timings) / elapsed, 1),
+        "p50_ms": percentile(timings, 0.50),
+        "p95_ms": percentile(timings, 0.95),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--processes', type=int, default=40)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--briefs', type=int, default=40)
+    parser.add_argument('--latency-median-ms', type=float, default=800)
+    parser.add_argument('--latency-p95-ms', type=float, default=2500)
+    parser.add_argument('--error-rate', type=float, default=0.02)
+    parser.add_argument('--cache', action='store_true', help="keep the LLM response cache on")
+    parser.add_argument('--no-batch', action='store_true', help="turn LLM micro-batching off")
+    args = parser.parse_args()
+
+    os.environ['HEALFLOW_LLM_BACKEND'] = 'fake'
+    os.environ['HEALFLOW_FAKE_LLM'] = json.dumps({
+        "latency_median_ms": args.latency_median_ms,
+        "latency_p95_ms": args.latency_p95_ms,
+        "error_rate": args.error_rate,
+        "seed": 7,
+    })
+
+    with temp_database(export=True):
+        import database as db
+        import llm
+        from app import app
+        from config import LLM_CACHE_CONFIG, LLM_BATCH_CONFIG
+        LLM_CACHE_CONFIG["enabled"] = args.cache
+        LLM_BATCH_CONFIG["enabled"] = not args.no_batch
+        db.ensure_initialized()
+
+        agent_id = db.get_all_agents()[0]['id']
+        signal_ids = [signal['id'] for signal in db.get_all_signals(limit=args.processes)]
+        process_ids = [db.create_ooda_process(agent_id, signal_ids[index % len(signal_ids)])['id']
+                       for index in range(args.processes)]
+        client = app.test_client()
+
+        def run_process(process_id):
+            # Stages of one process are sequential; processes run side by side
+            return [_timed(client, 'POST', '/api/ooda/step', {"process_id": process_id}) for _ in range(4)]
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            step_timings = [timing for timings in pool.map(run_process, process_ids) for timing in timings]
+        results = {"ooda_step": _result(step_timings, time.perf_counter() - start)}
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            brief_timings = list(pool.map(lambda _: _timed(client, 'GET', '/api/brief'), range(args.briefs)))
+        results["brief"] = _result(brief_timings, time.perf_counter() - start)
+
+        client_stats = llm.get_client_stats()
+        results["llm"] = {
+            "calls": client_stats["calls"],
+            "failures": client_stats["failures"],
+            "breaker": client_stats["breaker"]["state"],
+            "batching": llm.get_batch_stats(),
+        }
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""
+Serving load test: development server vs serve.py
+Starts each server against its own temporary copy of healflow.db, drives
+it with concurrent client processes over a mix of dashboard GET endpoints,
+and reports throughput and p50/p99 latency
+
+Usage: python benchmarks/bench_serving.py [--servers dev,prod] [--clients 16]
+                                          [--seconds 20] [--workers 4] [--threads 8]
+"dev" is `python app.py` (Werkzeug with the reloader, as the old Dockerfile
+ran it); "prod" is `python serve.py --workers W --threads T`.
+"""
+
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+
+from _common import BACKEND_DIR, percentile, temp_database
+
+# What an open dashboard polls
+ENDPOINTS = [
+    '/api/health',
+    '/api/dashboard/snapshot?time_period=24h',
+    '/api/signals?limit=50',
+    '/api/signals?limit=50&status=pending',
+    '/api/incidents?limit=50',
+    '/api/system/metrics?time_period=24h',
+    '/api/agents',
+    '/api/hil-requests',
+    '/api/analytics/revenue-at-risk',
+    '/api/audit-log?limit=100',
+]
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _start_server(kind, port, db_path, args):
+    command = [sys.executable, 'app.py'] if kind == 'dev' else [
+        sys.executable, 'serve.py', '--bind', f'127.0.0.1:{port}',
+        '--workers', str(args.workers), '--threads', str(args.threads)]
+    env = dict(os.environ, HEALFLOW_DB_PATH=db_path, HEALFLOW_PORT=str(port))
+    # Own session, so the reloader's child and gunicorn's workers stop with it
+    server = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, start_new_session=True,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/api/health', timeout=1).read()
+            return server
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.25)
+    _stop_server(server)
+    raise RuntimeError(f"{kind} server did not come up on port {port}")
+
+
+def _stop_server(server):
+    os.killpg(server.pid, signal.SIGTERM)
+    try:
+        server.wait(30)
+    except subprocess.TimeoutExpired:
+        os.killpg(server.pid, signal.SIGKILL)
+
+
+def _client(base_url, seconds, offset):
+    """One client: requests back to back, cycling through ENDPOINTS"""
+    timings, errors = [], 0
+    deadline = time.time() + seconds
+    index = offset
+    while time.time() < deadline:
+        path = ENDPOINTS[index % len(ENDPOINTS)]
+        index += 1
+        start = time.perf_counter()
+        try:
+            urllib.request.urlopen(base_url + path, timeout=30).read()
+            timings.append((time.perf_counter() - start) * 1000)
+        except (urllib.error.URLError, OSError):
+            errors += 1
+    return timings, errors
+
+
+def run_load(port, clients, seconds):
+    with ProcessPoolExecutor(max_workers=clients) as pool:
+        results = list(pool.map(_client, [f'http://127.0.0.1:{port}'] * clients,
+                                [seconds] * clients, range(clients)))
+    timings = sorted(timing for client_timings, _ in results for timing in client_timings)
+    return {
+        "requests": len(timings),
+        "errors": sum(errors for _, errors in results),
+        "requests_per_second": round(len(timings) / seconds, 1),
+        "p50_ms": percentile(timings, 0.50),
+        "p99_ms": percentile(timings, 0.99),
+        "max_ms": round(timings[-1], 1) if timings else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--servers', default='dev,prod')
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=20)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    results = {"clients": args.clients, "seconds": args.seconds, "servers": {}}
+    for kind in args.servers.split(','):
+        with temp_database() as db_path:
+            port = _free_port()
+            server = _start_server(kind, port, db_path, args)
+            try:
+                run_load(port, args.clients, 2)  # warm up caches and connections
+                print(f"⏱️ {kind}: {args.clients} clients for {args.seconds}s", file=sys.stderr)
+                results["servers"][kind] = run_load(port, args.clients, args.seconds)
+                if kind == 'prod':
+                    results["servers"][kind].update(workers=args.workers, threads=args.threads)
+            finally:
+                _stop_server(server)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Signal ingestion benchmark
+Compares POST /api/signals (one signal per request) against
+POST /api/signals/batch at several batch sizes
+
+Usage: python benchmarks/bench_signal_ingest.py [--signals 2000] [--batch-sizes 10,100,1000]
+Runs against a temporary copy of healflow.db so the real database is untouched.
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+
+from _common import BACKEND_DIR, temp_database
+
+sys.path.insert(0, BACKEND_DIR)
+
+
+def _make_signals(merchant_ids, count):
+    """Build request bodies like the monitors send"""
+    return [{
+        "type": "BENCH_SIGNAL",
+        "severity": random.choice(['CRITICAL', 'ERROR', 'WARN', 'INFO']),
+        "source": "Benchmark",
+        "endpoint": "/bench",
+        "merchant_id": random.choice(merchant_ids) if merchant_ids else None,
+        "metadata": {"latency_ms": random.randint(5, 900)},
+    } for _ in range(count)]
+
+
+def _run_single(client, signals):
+    """Post every signal on its own, returns elapsed seconds"""
+    start = time.perf_counter()
+    for signal in signals:
+        response = client.post('/api/signals', json=signal)
+        assert response.status_code == 201, response.status_code
+    return time.perf_counter() - start
+
+
+def _run_batch(client, signals, batch_size):
+    """Post the signals in batches, returns elapsed seconds"""
+    start = time.perf_counter()
+    for offset in range(0, len(signals), batch_size):
+        response = client.post('/api/signals/batch', json={"signals": signals[offset:offset + batch_size]})
+        assert response.status_code == 201, response.status_code
+    return time.perf_counter() - start
+
+
+def _result(count, elapsed):
+    return {
+        "signals": count,
+        "seconds": round(elapsed, 3),
+        "signals_per_second": round(count / elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--signals', type=int, default=2000)
+    parser.add_argument('--batch-sizes', default='10,100,1000')
+    args = parser.parse_args()
+
+    with temp_database(export=True):
+        import database as db
+        from app import app
+        db.ensure_initialized()
+
+        with db.get_db() as conn:
+            merchant_ids = [row[0] for row in conn.execute("SELECT id FROM merchants")]
+        signals = _make_signals(merchant_ids, args.signals)
+        client = app.test_client()
+
+        results = {"single": _result(len(signals), _run_single(client, signals))}
+        for batch_size in (int(size) for size in args.batch_sizes.split(',')):
+            elapsed = _run_batch(client, signals, batch_size)
+            results[f"batch_{batch_size}"] = _result(len(signals), elapsed)
+            results[f"batch_{batch_size}"]["speedup"] = round(
+                results[f"batch_{batch_size}"]["signals_per_second"] / results["single"]["signals_per_second"], 1)
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
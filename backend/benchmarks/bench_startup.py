@@ -0,0 +1,95 @@
+"""
+Cold start benchmark
+Times fresh interpreter processes importing database.py and app.py with
+lazy and eager database initialization
+
+Usage: python benchmarks/bench_startup.py [--runs 5] [--signals 1m]
+The source database is healflow.db, or one built by generate_data.py with
+--signals rows, initialized once and then left a day behind (as after a
+day of downtime), so eager init has to advance the data clock. Every run
+starts from a fresh temporary copy of it; the real database is untouched.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import statistics
+import subprocess
+import sys
+
+from _common import BACKEND_DIR, SOURCE_DB, temp_database
+
+# name -> (HEALFLOW_DB_INIT, code timed inside the child process)
+SCENARIOS = {
+    "import_database_lazy": ("lazy", "import database"),
+    "import_database_eager": ("eager", "import database"),
+    "import_app_lazy": ("lazy", "import app"),
+    "import_app_then_first_request": ("lazy", "import app; app.app.test_client().get('/api/health')"),
+    "import_google_genai": ("lazy", "from google import genai"),
+}
+
+CHILD = """
+import sys, time
+start = time.perf_counter()
+try:
+    exec({code!r})
+except ImportError:
+    print('skipped')
+    sys.exit(0)
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+def _prepare_source(source_db, signals):
+    """Build the source database at source_db (a copy of healflow.db unless
+    signals is given)"""
+    env = dict(os.environ, HEALFLOW_DB_PATH=source_db)
+    if signals:
+        subprocess.run([sys.executable, os.path.join('benchmarks', 'generate_data.py'), source_db,
+                        '--signals', signals], env=env, cwd=BACKEND_DIR, capture_output=True, check=True)
+    else:
+        # Schema upgrades are a one-off, not part of a normal start
+        subprocess.run([sys.executable, '-c', 'import database; database.ensure_initialized()'],
+                       env=env, cwd=BACKEND_DIR, capture_output=True, check=True)
+    # A day of downtime: the latest data is now a day old
+    conn = sqlite3.connect(source_db)
+    conn.execute("UPDATE system_status SET time_offset_seconds = time_offset_seconds - 86400")
+    conn.commit()
+    conn.close()
+
+
+def _run_once(init_mode, code, source_db):
+    """Time one child process, returns milliseconds or None if skipped"""
+    with temp_database(source_db) as db_path:
+        env = dict(os.environ, HEALFLOW_DB_PATH=db_path, HEALFLOW_DB_INIT=init_mode)
+        output = subprocess.run(
+            [sys.executable, '-c', CHILD.format(code=code)],
+            env=env, cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip().splitlines()[-1]
+        return None if output == 'skipped' else float(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--signals', help='generate the source database with this many signals, e.g. 1m')
+    args = parser.parse_args()
+
+    with temp_database(None if args.signals else SOURCE_DB) as source_db:
+        _prepare_source(source_db, args.signals)
+        results = {"runs": args.runs, "signals": args.signals or "healflow.db"}
+        for name, (init_mode, code) in SCENARIOS.items():
+            timings = [_run_once(init_mode, code, source_db) for _ in range(args.runs)]
+            if None in timings:
+                results[name] = "not installed"
+                continue
+            results[name] = {
+                "median_ms": round(statistics.median(timings), 1),
+                "min_ms": round(min(timings), 1),
+            }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
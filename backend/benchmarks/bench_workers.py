@@ -0,0 +1,93 @@
+"""
+Auto-resolution worker pool benchmark
+Creates a backlog of stale signals and drains it with increasing numbers of
+workers (workers.py), each resolution taking --work-ms to stand in for an
+LLM call, then checks that no signal got more than one auto-fixed incident
+
+Usage: python benchmarks/bench_workers.py [--signals 2000] [--workers 1,2,4,8]
+                                          [--work-ms 5] [--batch-size 50]
+Each run starts from a fresh temporary copy of healflow.db.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from _common import BACKEND_DIR, temp_database
+
+sys.path.insert(0, BACKEND_DIR)
+
+
+def _drain(signal_count, worker_count, work_ms, batch_size):
+    """Worker process body: database.py has picked up HEALFLOW_DB_PATH"""
+    import database as db
+    import workers
+    from config import WORKER_CONFIG
+    WORKER_CONFIG.update(batch_size=batch_size, interval_seconds=0.1)
+    db.ensure_initialized()
+
+    db.create_signals_batch([{"type": "BENCH_STALE", "severity": "WARN", "source": "Benchmark"}] * signal_count)
+    with db.get_db() as conn:
+        conn.execute("UPDATE signals SET timestamp = '2000-01-01T00:00:00' WHERE type = 'BENCH_STALE'")
+
+    def resolve(signal):
+        time.sleep(work_ms / 1000)
+        return workers.default_resolution(signal)
+
+    start = time.perf_counter()
+    workers.start(worker_count, resolve)
+    while db.get_stale_backlog()["stale"]:
+        time.sleep(0.05)
+    elapsed = time.perf_counter() - start
+    workers.stop()
+
+    with db.get_db() as conn:
+        incidents, signals = conn.execute('''
+            SELECT COUNT(*), COUNT(DISTINCT i.signal_id) FROM incidents i
+            JOIN signals s ON s.id = i.signal_id
+            WHERE s.type = 'BENCH_STALE' AND i.resolution_type = 'auto_fixed'
+        ''').fetchone()
+    return {
+        "workers": worker_count,
+        "seconds": round(elapsed, 2),
+        "signals_per_second": round(signal_count / elapsed, 1),
+        "incidents": incidents,
+        "duplicate_incidents": incidents - signals,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--signals', type=int, default=2000)
+    parser.add_argument('--workers', default='1,2,4,8')
+    parser.add_argument('--work-ms', type=float, default=5)
+    parser.add_argument('--batch-size', type=int, default=50)
+    parser.add_argument('--worker', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(_drain(args.signals, args.worker, args.work_ms, args.batch_size)))
+        return
+
+    results = []
+    for worker_count in [int(count) for count in args.workers.split(',')]:
+        with temp_database() as db_path:
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--worker', str(worker_count),
+                 '--signals', str(args.signals), '--work-ms', str(args.work_ms),
+                 '--batch-size', str(args.batch_size)],
+                env=dict(os.environ, HEALFLOW_DB_PATH=db_path), cwd=BACKEND_DIR,
+                capture_output=True, text=True, check=True
+            ).stdout
+            # database.py and the workers print progress; the result is the last line
+            results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(json.dumps(results, indent=2))
+    sys.exit(1 if any(result["duplicate_incidents"] for result in results) else 0)
+
+
+if __name__ == '__main__':
+    main()
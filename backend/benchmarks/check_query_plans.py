@@ -0,0 +1,47 @@
+"""
+Query plan regression check
+Runs EXPLAIN QUERY PLAN on every query shape in query_plans.py and fails
+when one regresses to a full scan of signals or incidents, or sorts
+instead of walking an index. The same check runs under pytest as
+tests/test_query_plans.py.
+
+Usage: python benchmarks/check_query_plans.py [--verbose]
+Exits non-zero on regression. Runs against a temporary copy of healflow.db.
+"""
+
+import argparse
+import sys
+
+from _common import BACKEND_DIR, temp_database
+
+sys.path.insert(0, BACKEND_DIR)
+
+from query_plans import iter_plans
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--verbose', action='store_true', help='print every plan')
+    args = parser.parse_args()
+
+    with temp_database(export=True, prefix='healflow_plans_'):
+        import database as db
+        db.ensure_initialized()
+
+        checked = 0
+        failures = []
+        for label, plan, problems in iter_plans(db):
+            checked += 1
+            if args.verbose:
+                print(f"{label}\n    " + "\n    ".join(plan))
+            if problems:
+                failures.append((label, problems))
+
+        for label, problems in failures:
+            print(f"FAIL {label}: {'; '.join(problems)}")
+        print(f"{checked} query shapes checked, {len(failures)} regressions")
+        return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,340 @@
+"""
+Synthetic data generator
+Builds a HealFlow database with configurable volumes of merchants, signals,
+incidents, OODA processes, HIL requests and audit rows. Signal times follow
+a diurnal/weekly cycle with bursty outages (short windows with many
+ERROR/CRITICAL signals of one type on one endpoint).
+
+Usage: python benchmarks/generate_data.py OUTPUT.db [--signals 1m] [--days 90]
+                                          [--merchants N] [--outages N]
+                                          [--incident-rate 0.02] [--seed 42]
+OUTPUT.db must not exist yet. Rows are streamed through executemany in one
+transaction with the secondary indexes dropped, and the indexes, rollups
+and planner statistics are built once at the end.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Distributions, as (value, weight)
+TIERS = [('enterprise', 15), ('mid_market', 35), ('sme', 50)]
+PHASES = [('pre-migration', 30), ('migration', 40), ('post-migration', 30)]
+SEVERITIES = [('INFO', 35), ('WARN', 25), ('SYSTEM', 20), ('ERROR', 15), ('CRITICAL', 5)]
+OUTAGE_SEVERITIES = [('CRITICAL', 35), ('ERROR', 50), ('WARN', 15)]
+SIGNAL_TYPES = ['API_LATENCY_SPIKE', 'PAYMENT_DECLINE_SPIKE', 'INVENTORY_MISMATCH', 'LOGIN_FAILURE_RATE',
+                'TOKEN_INVALID', 'LEGACY_BRIDGE_FAILURE', 'CACHE_REFRESH', 'HEARTBEAT']
+OUTAGE_TYPES = ['PAYMENT_DECLINE_SPIKE', 'LEGACY_BRIDGE_FAILURE', 'TOKEN_INVALID', 'API_LATENCY_SPIKE']
+SOURCES = [('PaymentGateway', '/api/v1/checkout'), ('InventoryService', '/api/v1/stock'),
+           ('LegacyBridge', '/api/v1/legacy/sync'), ('SystemMonitor', '/internal/health')]
+# Signals newer than this are still being worked on; older ones are settled
+ACTIVE_WINDOW = timedelta(hours=1)
+CHUNK_ROWS = 50000
+
+
+def parse_count(text):
+    """'10k' -> 10000, '1m' -> 1000000"""
+    multiplier = {'k': 1000, 'm': 1000000}.get(str(text)[-1].lower(), 1)
+    return int(float(str(text).rstrip('kKmM')) * multiplier)
+
+
+def _id(prefix, rng):
+    """generate_id-shaped ids from the seeded generator, so builds repeat"""
+    return f"{prefix}{rng.getrandbits(48):012x}"
+
+
+def _weighted(choices, count, rng):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights, k=count)
+
+
+# ==================== TIME DISTRIBUTION ====================
+
+def _minute_weights(start, minutes, outages):
+    """Relative signal rate for every minute of the window: a daily cycle
+    peaking mid-afternoon (mean rate 1), quieter weekends, and outages
+    adding 'multiplier' times the mean rate"""
+    weights = []
+    for minute in range(minutes):
+        moment = start + timedelta(minutes=minute)
+        hour = moment.hour + moment.minute / 60
+        rate = 1 + 0.8 * math.cos(2 * math.pi * (hour - 14) / 24)
+        if moment.weekday() >= 5:
+            rate *= 0.6
+        weights.append(rate)
+    for outage in outages:
+        for minute in range(outage["start"], min(outage["start"] + outage["duration"], minutes)):
+            weights[minute] += outage["multiplier"]
+    return weights
+
+
+def _plan_outages(count, minutes, merchants, rng):
+    outages = []
+    for _ in range(count):
+        source, endpoint = rng.choice(SOURCES[:3])
+        phase = rng.choice(PHASES)[0]
+        outages.append({
+            "start": rng.randrange(minutes),
+            "duration": rng.randint(10, 120),
+            "multiplier": rng.uniform(15, 40),
+            "type": rng.choice(OUTAGE_TYPES),
+            "source": source,
+            "endpoint": endpoint,
+            # Outages hit merchants in one migration phase
+            "merchant_ids": [m[0] for m in merchants if m[4] == phase] or [merchants[0][0]],
+        })
+    return outages
+
+
+# ==================== GENERATION ====================
+
+def _signal_rows(count, start, now, weights, outages, merchant_ids, incident_rate, candidates, rng):
+    """Yield signal rows; ERROR/CRITICAL signals picked for incidents are
+    also appended to candidates"""
+    minute_outage = {}
+    for index, outage in enumerate(outages):
+        for minute in range(outage["start"], outage["start"] + outage["duration"]):
+            minute_outage.setdefault(minute, index)
+    cumulative = []
+    total = 0.0
+    for weight in weights:
+        total += weight
+        cumulative.append(total)
+    minute_range = range(len(weights))
+
+    # Draws are made a chunk at a time; per-row random calls dominate otherwise
+    for offset in range(0, count, CHUNK_ROWS):
+        size = min(CHUNK_ROWS, count - offset)
+        minutes = rng.choices(minute_range, cum_weights=cumulative, k=size)
+        severities = _weighted(SEVERITIES, size, rng)
+        signal_types = rng.choices(SIGNAL_TYPES, k=size)
+        sources = rng.choices(SOURCES, k=size)
+        signal_merchants = rng.choices(merchant_ids, k=size)
+        latencies = rng.choices(range(5, 901), k=size)
+        for index, minute in enumerate(minutes):
+            severity = severities[index]
+            ts = start + timedelta(minutes=minute, seconds=rng.random() * 60)
+            outage = outages[minute_outage[minute]] if minute in minute_outage else None
+            if outage:
+                severity = _weighted(OUTAGE_SEVERITIES, 1, rng)[0]
+                signal_type, source, endpoint = outage["type"], outage["source"], outage["endpoint"]
+                merchant_id = rng.choice(outage["merchant_ids"])
+            else:
+                signal_type = signal_types[index]
+                source, endpoint = sources[index]
+                merchant_id = None if severity == 'SYSTEM' else signal_merchants[index]
+            if now - ts > ACTIVE_WINDOW:
+                status = 'escalated' if rng.random() < 0.03 else 'resolved'
+            else:
+                status = rng.choice(['pending', 'pending', 'processing', 'resolved'])
+            signal_id = f"sig_{rng.getrandbits(48):012x}"
+            iso = ts.isoformat()
+            if severity in ('ERROR', 'CRITICAL') and merchant_id and rng.random() < incident_rate:
+                candidates.append((signal_id, iso, merchant_id, signal_type, severity))
+            yield (signal_id, iso, severity, signal_type, source, endpoint, merchant_id,
+                   f'{{"latency_ms": {latencies[index]}}}', None, status, iso)
+
+
+def _stage_times(detected, rng):
+    times = [detected]
+    for _ in range(4):
+        times.append(times[-1] + timedelta(seconds=rng.randint(2, 90)))
+    return [moment.isoformat() for moment in times]
+
+
+def generate(db, signals, days=90, merchants=None, outages=None, incident_rate=0.02, seed=42):
+    """Load synthetic data into the initialized database behind db (the
+    database module). Returns row counts and per-phase timings."""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    minutes = days * 1440
+    start = now - timedelta(minutes=minutes)
+    merchant_count = merchants or max(signals // 2000, 5)
+    outage_count = days // 5 if outages is None else outages
+    timings = {}
+    phase_start = time.perf_counter()
+
+    with db.get_db() as conn:
+        cursor = conn.cursor()
+        # Bulk-load settings, reset to the configured profile afterwards
+        # since callers go on to time queries on this same connection
+        cursor.execute('PRAGMA synchronous = OFF')
+        cursor.execute('PRAGMA cache_size = -524288')
+        # Deferred index builds: one sort per index beats millions of
+        # random B-tree inserts
+        for name in db.MANAGED_INDEXES:
+            cursor.execute(f'DROP INDEX IF EXISTS {name}')
+        agent_ids = [row[0] for row in cursor.execute('SELECT id FROM agents')]
+
+        merchant_rows = [(_id('merch_', rng), f"Merchant {index:05d}", tier, None, phase, start.isoformat())
+                         for index, (tier, phase) in enumerate(zip(_weighted(TIERS, merchant_count, rng),
+                                                                   _weighted(PHASES, merchant_count, rng)))]
+        cursor.executemany('''
+            INSERT INTO merchants (id, name, tier, logo_url, migration_phase, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', merchant_rows)
+
+        outage_plan = _plan_outages(outage_count, minutes, merchant_rows, rng)
+        weights = _minute_weights(start, minutes, outage_plan)
+        candidates = []
+        cursor.executemany(
+            f"INSERT INTO signals ({', '.join(db._SIGNAL_COLUMNS)}) VALUES ({', '.join('?' * len(db._SIGNAL_COLUMNS))})",
+            _signal_rows(signals, start, now, weights, outage_plan, [m[0] for m in merchant_rows],
+                         incident_rate, candidates, rng))
+        timings["signals"] = time.perf_counter() - phase_start
+
+        # Incidents, each with a completed OODA process; a third of the
+        # critical ones went through a HIL request
+        phase_start = time.perf_counter()
+        incidents, processes, hil_requests, audit_rows = [], [], [], []
+        for signal_id, detected_iso, merchant_id, signal_type, severity in candidates:
+            detected = datetime.fromisoformat(detected_iso)
+            agent_id = rng.choice(agent_ids)
+            process_id = _id('ooda_', rng)
+            stage_times = _stage_times(detected, rng)
+            processes.append((
+                process_id, agent_id, signal_id, stage_times[0], stage_times[4],
+                json.dumps([f"{signal_type} on {merchant_id}"]), stage_times[1],
+                f"{signal_type} correlates with migration activity", stage_times[2],
+                json.dumps(["Identify scope", "Match known pattern", "Propose fix"]),
+                json.dumps({"type": "config_change", "confidence": rng.randint(60, 99)}), stage_times[3],
+                json.dumps([{"type": "config_update", "description": "Apply fix"}]), stage_times[4],
+            ))
+            open_incident = now - detected < ACTIVE_WINDOW
+            hil_id = None
+            if severity == 'CRITICAL' and rng.random() < 0.33:
+                hil_id = _id('hil_', rng)
+                hil_status = 'pending' if open_incident else rng.choice(['approved', 'approved', 'rejected'])
+                hil_requests.append((
+                    hil_id, agent_id, signal_id, process_id, stage_times[3], 'high',
+                    f"Approve fix for {signal_type}", "Apply fix",
+                    json.dumps({"revenue_at_risk": rng.randint(1000, 50000)}), hil_status,
+                    (detected + timedelta(hours=1)).isoformat(),
+                ))
+                audit_rows.append((_id('audit_', rng), stage_times[3], 'create', 'hil_request', hil_id, 'system', None))
+            resolved_at = None if open_incident else detected + timedelta(minutes=rng.randint(1, 240))
+            if hil_id and resolved_at:
+                audit_rows.append((_id('audit_', rng), resolved_at.isoformat(), 'resolve', 'hil_request', hil_id,
+                                   'system', json.dumps({"action": hil_status})))
+            incident_id = _id('inc_', rng)
+            incidents.append((
+                incident_id, signal_id, merchant_id, signal_type, signal_type.replace('_', ' ').title(),
+                'critical' if severity == 'CRITICAL' else rng.choice(['high', 'medium']),
+                'detected' if open_incident else 'resolved', detected_iso,
+                resolved_at.isoformat() if resolved_at else None,
+                int((resolved_at - detected).total_seconds()) if resolved_at else None,
+                None if open_incident else ('human_resolved' if hil_id else 'auto_fixed'),
+                rng.randint(0, 20000), rng.randint(0, 5000), agent_id, process_id, hil_id, detected_iso,
+            ))
+        cursor.executemany('''
+            INSERT INTO ooda_processes (
+                id, agent_id, signal_id, started_at, completed_at,
+                observe_status, observe_findings, observe_completed_at,
+                orient_status, orient_context, orient_completed_at,
+                decide_status, decide_chain_of_thought, decide_proposed_solution, decide_completed_at,
+                act_status, act_actions, act_completed_at
+            ) VALUES (?, ?, ?, ?, ?, 'complete', ?, ?, 'complete', ?, ?, 'complete', ?, ?, ?, 'complete', ?, ?)
+        ''', processes)
+        cursor.executemany('''
+            INSERT INTO hil_requests (id, agent_id, signal_id, ooda_process_id, created_at, priority,
+                                      title, proposed_action, metrics, status, expires_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', hil_requests)
+        cursor.executemany('''
+            INSERT INTO incidents (id, signal_id, merchant_id, type, title, severity, status, detected_at,
+                                   resolved_at, resolution_time, resolution_type, revenue_protected,
+                                   affected_users, agent_id, ooda_process_id, hil_request_id, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', incidents)
+        timings["incidents"] = time.perf_counter() - phase_start
+
+        # Audit, in the app's vocabulary: one 'create' row per signal,
+        # written set-based from the loaded signals, plus the HIL rows above
+        phase_start = time.perf_counter()
+        cursor.executemany(db._AUDIT_INSERT_SQL, audit_rows)
+        cursor.execute('''
+            INSERT INTO audit_log (id, timestamp, action_type, entity_type, entity_id, actor, details)
+            SELECT 'audit_' || substr(id, 5), created_at, 'create', 'signal', id, 'system', NULL
+            FROM signals WHERE id LIKE 'sig\\_%' ESCAPE '\\'
+        ''')
+        audit_count = cursor.rowcount + len(audit_rows)
+        timings["audit_log"] = time.perf_counter() - phase_start
+
+        # Hourly time series following the same cycle and outages
+        phase_start = time.perf_counter()
+        hourly = [sum(weights[hour * 60:(hour + 1) * 60]) / 60 for hour in range(days * 24)]
+        cursor.executemany('''
+            INSERT INTO revenue_at_risk (id, timestamp, amount, incidents_count, created_at)
+            VALUES (?, ?, ?, ?, ?)
+        ''', [(_id('risk_', rng), (start + timedelta(hours=hour)).isoformat(), round(8000 * rate, 2),
+               int(rate), now.isoformat()) for hour, rate in enumerate(hourly)])
+        cursor.executemany('''
+            INSERT INTO metrics (id, timestamp, period, revenue_protected, auto_resolution_rate,
+                                 total_incidents, migration_health_score, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [(_id('metric_', rng), (start + timedelta(hours=hour)).isoformat(),
+               'day' if hour % 24 == 23 else 'hour', round(4000 * rate, 2),
+               round(max(99 - rate, 70), 1), int(rate * 3), round(max(100 - rate, 60), 1), now.isoformat())
+              for hour, rate in enumerate(hourly)])
+        timings["time_series"] = time.perf_counter() - phase_start
+
+        phase_start = time.perf_counter()
+        db._ensure_indexes(cursor)
+        timings["indexes"] = time.perf_counter() - phase_start
+
+        phase_start = time.perf_counter()
+        db._rebuild_signal_rollups(cursor)
+        cursor.execute('ANALYZE')
+        timings["rollups_and_analyze"] = time.perf_counter() - phase_start
+    db._apply_profile(conn, db.SQLITE_PROFILES[db.DATABASE_PROFILE])
+    db._clear_metrics_cache()
+
+    # Leave the time series downsampled, as the running app keeps them
+    phase_start = time.perf_counter()
+    db.compact_timeseries(now)
+    timings["downsampling"] = time.perf_counter() - phase_start
+
+    return {
+        "rows": {"merchants": len(merchant_rows), "signals": signals, "incidents": len(incidents),
+                 "ooda_processes": len(processes), "hil_requests": len(hil_requests),
+                 "audit_log": audit_count, "revenue_at_risk": len(hourly), "metrics": len(hourly)},
+        "outages": len(outage_plan),
+        "seconds": {phase: round(seconds, 2) for phase, seconds in timings.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('output')
+    parser.add_argument('--signals', default='1m')
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--merchants', type=int, help='default: one per 2000 signals, at least 5')
+    parser.add_argument('--outages', type=int, help='default: one per 5 days')
+    parser.add_argument('--incident-rate', type=float, default=0.02,
+                        help='share of merchant ERROR/CRITICAL signals that open an incident')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    if os.path.exists(args.output):
+        parser.error(f"{args.output} already exists")
+    os.environ['HEALFLOW_DB_PATH'] = os.path.abspath(args.output)
+
+    import database as db
+    start = time.perf_counter()
+    db.ensure_initialized()
+    result = generate(db, parse_count(args.signals), args.days, args.merchants, args.outages,
+                      args.incident_rate, args.seed)
+    result["total_seconds"] = round(time.perf_counter() - start, 2)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
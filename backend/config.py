@@ -155,6 +155,261 @@ RISK_THRESHOLDS = {
     "low": 0            # < $100/hour
 }
 
+# Live Stream (Server-Sent Events) Configuration
+STREAM_CONFIG = {
+    "retention_events": 5000,        # change events kept for Last-Event-ID resume
+    "batch_size": 100,               # max events sent per database read
+    "poll_interval_seconds": 1.0,    # re-check for writes from other processes
+    "heartbeat_interval_seconds": 15,
+    "client_retry_ms": 3000,
+}
+
+# Conditional GET (ETag / 304) Configuration
+ETAG_CONFIG = {
+    # Responses filtered by time_period also change as rows age out of the
+    # window, so their ETags roll over at least this often
+    "time_window_bucket_seconds": 60,
+    # Versions are kept in the database, so writes through database.py
+    # from any process are seen by all of them. Set this to also notice
+    # commits by tools writing to the file directly (PRAGMA data_version);
+    # ETags then differ per process, costing some 304s.
+    "detect_external_writes": False,
+}
+
+# Metrics Cache Configuration (get_current_metrics results per filter set)
+METRICS_CACHE_CONFIG = {
+    "max_entries": 128,
+    "ttl_seconds": 5,
+}
+
+# SQLite Connection Profiles, applied to every connection database.py opens.
+# Select one with DATABASE_CONFIG["profile"] or the HEALFLOW_DB_PROFILE env var.
+#   journal_mode   WAL lets readers run while a write is in progress
+#   synchronous    FULL fsyncs every commit; NORMAL (safe in WAL mode) only
+#                  at checkpoints, so a power loss can drop the last commits
+#   cache_size     page cache per connection, negative = KiB
+#   mmap_size      bytes of the file read through memory mapping
+#   busy_timeout   ms to wait for a lock before raising "database is locked"
+SQLITE_PROFILES = {
+    # SQLite's own defaults (what every connection used before profiles)
+    "legacy": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "cache_size": -2000,
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+        "busy_timeout": 5000,
+    },
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -16000,
+        "mmap_size": 0,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+    "balanced": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -32000,
+        "mmap_size": 128 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+    # No fsync at all: an OS crash can corrupt the database. Demos and benchmarks only.
+    "fast": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -64000,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+}
+
+DATABASE_CONFIG = {
+    "profile": "balanced",
+    # "lazy": importing database.py does no I/O; schema, seeding and the
+    # data clock update run on the first ensure_initialized() call.
+    # "eager": run them at import time. Override with HEALFLOW_DB_INIT.
+    "init_mode": "lazy",
+}
+
+# List Pagination Configuration (/api/signals, /api/incidents)
+PAGINATION_CONFIG = {
+    "max_limit": 500,
+    "default_count_mode": "exact",   # exact | approx | none
+    "approx_count_cap": 1000,        # approx counts stop here and report an estimate
+}
+
+# Signal Ingestion Configuration
+INGEST_CONFIG = {
+    "max_batch_size": 5000,          # signals accepted per POST /api/signals/batch
+    # "sync" commits every create_signal / log_audit call on its own;
+    # "write_behind" queues them for a writer thread that commits in groups
+    "mode": "sync",
+    "queue_max_rows": 10000,         # producers block when the queue is full
+    "group_commit_rows": 500,        # commit once this many rows are queued...
+    "group_commit_ms": 5,            # ...or this long after the first one
+    # "wait": producers block until their group commits (durable on return)
+    # "async": producers return once queued (rows in the queue are lost on crash)
+    "durability": "wait",
+    "shutdown_flush_timeout_seconds": 10,
+}
+
+# Time-series downsampling (metrics, revenue_at_risk). Raw rows are folded
+# into hourly buckets (sum, max, count per field) once older than the raw
+# retention, hourly buckets into daily ones after theirs, and daily buckets
+# are dropped after day_retention_days
+TIMESERIES_CONFIG = {
+    "raw_retention_hours": 48,
+    "hour_retention_days": 30,
+    "day_retention_days": 730,
+    # History endpoints use the coarsest resolution that still gives the
+    # requested range at least this many points
+    "min_points": 24,
+    "compact_interval_seconds": 300, # run by the background tasks
+    "series": {
+        "revenue_at_risk": {"fields": ["amount", "incidents_count"]},
+        # Hourly and daily metrics snapshots are kept as separate series
+        "metrics": {
+            "fields": ["revenue_protected", "dev_hours_saved", "auto_resolution_rate", "total_incidents",
+                       "auto_resolved", "human_intervention", "migration_health_score", "active_migrations"],
+            "partition": "period",
+        },
+    },
+}
+
+# Audit log retention. Rows older than hot_retention_days move to gzip
+# NDJSON segment files (append-only, one gzip member per batch) listed in
+# the audit_segments table; /api/audit-log reads both transparently
+AUDIT_ARCHIVE_CONFIG = {
+    "hot_retention_days": 14,
+    "archive_dir": "audit_archive",  # relative to the database's directory; env HEALFLOW_AUDIT_ARCHIVE_DIR
+    "batch_rows": 5000,              # rows appended and deleted per transaction
+    "segment_max_rows": 200000,      # a segment file is closed after this many rows
+    "segment_cache_size": 4,         # decoded segments kept in memory for reads
+    "archive_interval_seconds": 3600, # run by the background tasks
+}
+
+# Auto-resolution workers (workers.py): lease stale signals and resolve them
+WORKER_CONFIG = {
+    "threads": 2,                    # worker threads started with the app's background tasks
+    "embedded": True,                # start them with the app; False to run workers.py separately
+    "interval_seconds": 10,          # idle wait between claims
+    "stale_after_seconds": 45,       # pending/processing longer than this gets auto-resolved
+    "statuses": ["pending", "processing"],
+    "batch_size": 100,               # signals claimed per lease
+    "lease_seconds": 60,
+    "heartbeat_seconds": 15,         # lease renewal interval while working
+    "agent_id": "agent_background_ai",
+    "resolution": "Auto-resolved by Background AI Agent",
+    "resolved_by": "HealFlow_Auto_GBK",
+}
+
+# Production server (serve.py)
+SERVER_CONFIG = {
+    "host": "0.0.0.0",
+    "port": 5000,                    # also used by the dev server; env HEALFLOW_PORT
+    "workers": 4,                    # gunicorn worker processes
+    "threads": 8,                    # request threads per worker process
+    "timeout_seconds": 120,          # covers a synchronous /api/ooda/step with LLM retries
+    "graceful_timeout_seconds": 30,
+    # The one process holding this lock (next to the database) runs the
+    # heartbeat and the embedded auto-resolution workers
+    "background_lock_suffix": ".background.lock",
+}
+
+# Background Job Pool (asynchronous OODA steps)
+JOB_CONFIG = {
+    "pool_size": 4,                  # jobs running at once
+    "queue_depth": 32,               # jobs waiting; further submits get 503
+    "retention": 500,                # finished jobs kept for GET /api/jobs/<id>
+    # A queued/running job older than this was lost with its process; a
+    # new submit with the same key marks it failed and starts over
+    "stale_after_seconds": 600,
+    "ooda_step_async": False,        # default for /api/ooda/step without "async"
+}
+
+# LLM Configuration
+LLM_CONFIG = {
+    "backend": "gemini",               # or "fake" (fake_llm.py); env HEALFLOW_LLM_BACKEND
+    "model": "gemini-2.0-flash",
+    "max_concurrent_calls": 4,         # calls in flight across all request threads
+    "slot_wait_seconds": 2,            # give up if no call slot frees up in this time
+    "call_timeout_seconds": 20,        # per-attempt deadline
+    "max_retries": 2,
+    "retry_backoff_seconds": 0.5,      # full-jitter exponential backoff base...
+    "retry_backoff_max_seconds": 4,    # ...and cap
+    "breaker_failure_threshold": 5,    # consecutive failures that open the breaker
+    "breaker_reset_seconds": 30,       # open time before a half-open probe call
+    "latency_buckets_ms": [100, 250, 500, 1000, 2500, 5000, 10000, 20000],
+}
+
+# Fake LLM backend for offline load tests (fake_llm.py)
+FAKE_LLM_CONFIG = {
+    "latency_median_ms": 800,
+    "latency_p95_ms": 2500,
+    "batch_item_ms": 150,            # extra latency per item in a batched prompt
+    "error_rate": 0.02,
+    "batch_drop_rate": 0.0,          # items left out of batched replies
+    "seed": None,
+    "outputs": {
+        "observe": {"findings": [
+            "Error rate on the affected endpoint rose sharply within the last 5 minutes",
+            "Failures are concentrated on merchants already migrated to the headless stack",
+            "No matching deploy in the change log for this window",
+        ]},
+        "orient": {
+            "context": "Pattern matches a session-token mismatch between legacy and headless checkout.",
+            "related": ["Token mapping regression during phase 2 rollout", "Gateway header stripping"],
+        },
+        "decide": {
+            "chain_of_thought": [
+                "Errors started after traffic shifted to the new gateway.",
+                "Legacy session tokens are missing the mapped header.",
+                "Headless-only merchants are unaffected.",
+                "Restoring the header mapping is low-effort and reversible.",
+                "Request approval because checkout revenue is at risk.",
+            ],
+            "proposed_solution": {
+                "type": "config_change",
+                "description": "Restore legacy session header mapping on the gateway",
+                "confidence": 82,
+                "risk_level": "medium",
+            },
+        },
+        "act": {"actions": [
+            {"type": "config_update", "description": "Re-enable legacy session header mapping"},
+            {"type": "monitor", "description": "Watch checkout error rate for 15 minutes"},
+        ]},
+        "brief": "Checkout stayed healthy overall; automated remediation contained the migration issues "
+                 "seen today and protected revenue. No action is required from leadership.",
+    },
+}
+
+# LLM Micro-batching: concurrent uncached OODA stage requests (e.g. a burst
+# of signals during an outage) are merged into one multi-item prompt
+LLM_BATCH_CONFIG = {
+    "enabled": True,
+    "max_items": 8,                  # send once this many requests are waiting...
+    "max_wait_ms": 150,              # ...or this long after the first one arrived
+    "max_concurrent_batches": 4,     # batch calls in flight at once
+}
+
+# LLM Response Cache (llm_cache table). Prompts for recurring signals differ
+# only in ids and timestamps, so responses are keyed by a fingerprint of the
+# fields that shape the answer.
+LLM_CACHE_CONFIG = {
+    "enabled": True,
+    "max_entries": 2000,             # least recently used entries are evicted beyond this
+    "ttl_seconds": 7 * 24 * 3600,
+    "ttl_overrides": {"brief": 600}, # per kind; briefs summarize live metrics
+    # Categorical signal metadata that changes the diagnosis; numeric
+    # readings (latency, counts) are left out so they don't split the cache
+    "metadata_keys": ["error", "provider", "model", "issuer", "cluster", "table"],
+}
+
 # OODA Stage Configuration
 OODA_STAGES = [
     {"id": "observe", "label": UI_LABELS["ooda_observe"], "order": 1},
@@ -0,0 +1,154 @@
+"""
+HealFlow Fake LLM
+Offline stand-in for Gemini used for load testing. FakeClient has the
+google-genai surface llm.py uses (client.models.generate_content(...).text);
+run this module to serve the same answers over Gemini's REST API for
+clients pointed at it with GEMINI_BASE_URL.
+
+Usage: python fake_llm.py [--port 8090]
+Latency, error rate and canned outputs come from FAKE_LLM_CONFIG, with
+overrides taken from the HEALFLOW_FAKE_LLM environment variable (JSON).
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+from config import FAKE_LLM_CONFIG
+
+# Phrases from the app's prompts that tell the fake what is being asked
+_PROMPT_KINDS = [
+    ("complete OODA analysis", "pipeline"),
+    ("identify key observations", "observe"),
+    ("provide context", "orient"),
+    ("determine root cause", "decide"),
+    ("action plan", "act"),
+    ("executive summary", "brief"),
+]
+
+_BATCH_SECTION = re.compile(r'^### Request (r\d+)\n', re.MULTILINE)
+
+
+class FakeLLMError(Exception):
+    """Injected failure, raised at FAKE_LLM_CONFIG['error_rate']"""
+
+
+def load_config():
+    """FAKE_LLM_CONFIG merged with the HEALFLOW_FAKE_LLM overrides"""
+    config = dict(FAKE_LLM_CONFIG)
+    overrides = os.getenv('HEALFLOW_FAKE_LLM')
+    if overrides:
+        config.update(json.loads(overrides))
+    return config
+
+
+class FakeClient:
+    """Drop-in for genai.Client: answers prompts with canned JSON after a
+    sampled delay, and fails some of them"""
+
+    def __init__(self, config=None):
+        self.config = config or load_config()
+        self.models = self
+        self._random = random.Random(self.config.get("seed"))
+        self._random_lock = threading.Lock()
+
+    def generate_content(self, model, contents):
+        with self._random_lock:
+            delay_ms = self._latency_ms()
+            fail = self._random.random() < self.config["error_rate"]
+        sections = _BATCH_SECTION.split(contents)
+        if len(sections) > 1:
+            delay_ms += self.config["batch_item_ms"] * (len(sections) // 2)
+        time.sleep(delay_ms / 1000)
+        if fail:
+            raise FakeLLMError("fake LLM: injected error (503 UNAVAILABLE)")
+        return SimpleNamespace(text=self.answer(contents))
+
+    def _latency_ms(self):
+        """Lognormal with the configured median and p95"""
+        median, p95 = self.config["latency_median_ms"], self.config["latency_p95_ms"]
+        sigma = math.log(p95 / median) / 1.645 if p95 > median else 0.0
+        return self._random.lognormvariate(math.log(median), sigma)
+
+    def answer(self, prompt):
+        """Canned response text for an app prompt, batched or not"""
+        sections = _BATCH_SECTION.split(prompt)
+        if len(sections) == 1:
+            return self._single_answer(prompt)
+        # [preamble, id, body, id, body, ...]
+        reply = {}
+        for request_id, body in zip(sections[1::2], sections[2::2]):
+            with self._random_lock:
+                dropped = self._random.random() < self.config["batch_drop_rate"]
+            if not dropped:
+                reply[request_id] = json.loads(self._single_answer(body))
+        return json.dumps(reply)
+
+    def _single_answer(self, prompt):
+        outputs = self.config["outputs"]
+        kind = next((kind for phrase, kind in _PROMPT_KINDS if phrase in prompt), None)
+        if kind == "pipeline":
+            return json.dumps({stage: outputs[stage] for stage in ("observe", "orient", "decide", "act")})
+        if kind == "brief":
+            return outputs["brief"]
+        return json.dumps(outputs.get(kind, {}))
+
+
+# ==================== REST SERVER ====================
+
+class _Handler(BaseHTTPRequestHandler):
+    client = None
+
+    def do_POST(self):
+        # google-genai posts to /{version}/models/{model}:generateContent
+        if not self.path.split('?')[0].endswith(':generateContent'):
+            self._send(404, {"error": {"code": 404, "message": "not found", "status": "NOT_FOUND"}})
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        prompt = "\n".join(part.get("text", "") for content in body.get("contents", [])
+                           for part in content.get("parts", []))
+        try:
+            text = self.client.generate_content(model=None, contents=prompt).text
+        except FakeLLMError as e:
+            self._send(503, {"error": {"code": 503, "message": str(e), "status": "UNAVAILABLE"}})
+            return
+        self._send(200, {
+            "candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": "STOP"}],
+        })
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    args = parser.parse_args()
+
+    _Handler.client = FakeClient()
+    server = ThreadingHTTPServer((args.host, args.port), _Handler)
+    print(f"🧪 Fake LLM listening on http://{args.host}:{args.port} "
+          f"(median {_Handler.client.config['latency_median_ms']}ms, "
+          f"error rate {_Handler.client.config['error_rate']:.0%})")
+    print(f"   Point the app at it with GEMINI_BASE_URL=http://{args.host}:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
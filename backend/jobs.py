@@ -0,0 +1,140 @@
+"""
+HealFlow Background Jobs
+Bounded worker pool for slow request work such as LLM-backed OODA steps.
+A job runs in the process that accepted it, but its record lives in SQLite
+(database.py JOBS), so GET /api/jobs/<id> works from any server process
+and a job key is active in at most one process at a time. Completions are
+published to the change feed as job.succeeded / job.failed so clients can
+subscribe instead of polling. A job whose process exits is not resumed; a
+resubmit with its key replaces it after JOB_CONFIG['stale_after_seconds'].
+"""
+
+import os
+import queue
+import socket
+import threading
+from datetime import datetime
+
+import database as db
+from config import JOB_CONFIG
+
+
+class JobQueueFull(Exception):
+    """Raised by submit when the pending-job queue is at capacity"""
+
+
+_pending = queue.Queue(maxsize=JOB_CONFIG["queue_depth"])
+_jobs_lock = threading.Lock()
+_reserved = 0  # queue slots held by submits whose job insert is in progress
+_workers = []
+_stats = {"submitted": 0, "succeeded": 0, "failed": 0, "rejected": 0, "running": 0}
+_owner = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _start_workers():
+    """Start the pool on first use"""
+    with _jobs_lock:
+        if _workers:
+            return
+        for index in range(JOB_CONFIG["pool_size"]):
+            worker = threading.Thread(target=_worker_loop, name=f"healflow-job-{index}", daemon=True)
+            worker.start()
+            _workers.append(worker)
+
+
+def submit(job_type, func, *args, key=None):
+    """Queue func(*args) and return the job. A job with the same key that is
+    still queued or running, in any process, is returned instead of queuing
+    a duplicate. Raises JobQueueFull when queue_depth jobs are already waiting."""
+    global _reserved
+    _start_workers()
+    with _jobs_lock:
+        # Only submit puts, and only into a slot it reserved here, so the
+        # reserved slot is still free after the insert below
+        if _pending.qsize() + _reserved >= JOB_CONFIG["queue_depth"]:
+            _stats["rejected"] += 1
+            raise JobQueueFull(f"{JOB_CONFIG['queue_depth']} jobs already queued")
+        _reserved += 1
+    
+    # The insert waits on the SQLite write lock; don't hold _jobs_lock meanwhile
+    try:
+        job, created = db.create_job(job_type, _owner, key, JOB_CONFIG["stale_after_seconds"])
+    except Exception:
+        with _jobs_lock:
+            _reserved -= 1
+        raise
+    
+    with _jobs_lock:
+        _reserved -= 1
+        if created:
+            _pending.put_nowait((job["id"], func, args))
+            _stats["submitted"] += 1
+    return job
+
+
+def _worker_loop():
+    while True:
+        job_id, func, args = _pending.get()
+        try:
+            status = _run_job(job_id, func, args)
+        except Exception as e:
+            # e.g. "database is locked" outlasting busy_timeout: keep this
+            # pool thread alive and don't leave the job queued or running
+            status = "failed"
+            print(f"⚠️ Job {job_id} failed: {e}")
+            try:
+                db.update_job(job_id, {"status": "failed", "finished_at": datetime.utcnow().isoformat(),
+                                       "error": str(e)})
+            except Exception as e:
+                print(f"⚠️ Job {job_id} could not be marked failed: {e}")
+        if status:
+            with _jobs_lock:
+                _stats[status] += 1
+
+
+def _run_job(job_id, func, args):
+    """Run one queued job and record its outcome. Returns the final status,
+    or None if the job record is gone."""
+    job = db.update_job(job_id, {"status": "running", "started_at": datetime.utcnow().isoformat()})
+    if job is None:
+        # Replaced by a resubmit after stale_after_seconds, then trimmed
+        print(f"⚠️ Job {job_id} was removed before it ran, skipping")
+        return None
+    with _jobs_lock:
+        _stats["running"] += 1
+    try:
+        try:
+            result, error = func(*args), None
+        except Exception as e:
+            result, error = None, str(e)
+            print(f"Job {job_id} ({job['type']}) failed: {e}")
+        
+        status = "failed" if error else "succeeded"
+        snapshot = db.update_job(job_id, {"status": status, "finished_at": datetime.utcnow().isoformat(),
+                                          "result": result, "error": error})
+    finally:
+        with _jobs_lock:
+            _stats["running"] -= 1
+    
+    try:
+        db.trim_jobs(JOB_CONFIG["retention"])
+        db.publish_change('job', status, job_id, snapshot)
+    except Exception as e:
+        print(f"Job {job_id} completion failed: {e}")
+    return status
+
+
+def get_job(job_id):
+    """Get a job by ID"""
+    return db.get_job(job_id)
+
+
+def get_stats():
+    """Get pool size, queue depth and this process's job counters"""
+    with _jobs_lock:
+        return {
+            "pool_size": JOB_CONFIG["pool_size"],
+            "queue_depth": JOB_CONFIG["queue_depth"],
+            "queued": _pending.qsize(),
+            **_stats,
+        }
@@ -0,0 +1,412 @@
+"""
+HealFlow LLM Client
+Gemini access with the SDK imported and the client created on first use,
+so importing the app (or a CLI tool) never pays for google-genai.
+Every call goes through generate_text, which caps concurrency, enforces a
+per-call deadline, retries with jittered backoff and trips a circuit
+breaker when Gemini keeps failing.
+Responses can be cached in SQLite by prompt fingerprint (generate_cached)
+and concurrent requests merged into one multi-item prompt (batching).
+"""
+
+import hashlib
+import json
+import os
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+import database as db
+from config import LLM_CONFIG, LLM_CACHE_CONFIG, LLM_BATCH_CONFIG
+
+LLM_BACKEND = os.getenv('HEALFLOW_LLM_BACKEND') or LLM_CONFIG['backend']
+
+_client = None
+_client_loaded = False
+_client_lock = threading.Lock()
+
+
+def is_configured():
+    """True if an API key is set (or the fake backend is selected); does
+    not import the SDK"""
+    return LLM_BACKEND == "fake" or bool(os.getenv("GEMINI_API_KEY"))
+
+
+def _gemini_client():
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        print("⚠️ GEMINI_API_KEY not found")
+        return None
+    try:
+        from google import genai
+    except ImportError:
+        print("⚠️ google-genai not installed")
+        return None
+    # GEMINI_BASE_URL points the SDK elsewhere, e.g. at fake_llm.py's server
+    base_url = os.getenv("GEMINI_BASE_URL")
+    client = genai.Client(api_key=api_key, http_options={"base_url": base_url} if base_url else None)
+    print(f"✅ Gemini AI configured successfully{f' ({base_url})' if base_url else ''}")
+    return client
+
+
+def _fake_client():
+    import fake_llm
+    client = fake_llm.FakeClient()
+    print(f"🧪 Using fake LLM backend (median {client.config['latency_median_ms']}ms, "
+          f"error rate {client.config['error_rate']:.0%})")
+    return client
+
+
+# Backend name -> factory returning an object shaped like genai.Client
+# (client.models.generate_content(model=..., contents=...).text), or None
+LLM_BACKENDS = {
+    "gemini": _gemini_client,
+    "fake": _fake_client,
+}
+
+
+def get_client():
+    """Get the LLM client for LLM_BACKEND, creating it on the first call.
+    Returns None if the backend cannot be used (e.g. no key or SDK)."""
+    global _client, _client_loaded
+    if _client_loaded:
+        return _client
+    with _client_lock:
+        if not _client_loaded:
+            if LLM_BACKEND not in LLM_BACKENDS:
+                print(f"⚠️ Unknown LLM backend '{LLM_BACKEND}'")
+            else:
+                _client = LLM_BACKENDS[LLM_BACKEND]()
+            _client_loaded = True
+    return _client
+
+
+def is_available():
+    """True if LLM calls can be made (loads the client if needed); False
+    while the circuit breaker is open so callers go straight to fallbacks"""
+    return get_client() is not None and _breaker_state() != "open"
+
+
+def generate_text(prompt, model=None):
+    """Send a prompt to Gemini and return the response text. Raises
+    LLMUnavailable when the breaker is open or no call slot frees up,
+    otherwise the last error once retries are used up."""
+    client = get_client()
+    if client is None:
+        raise RuntimeError("Gemini client is not available")
+    
+    for attempt in range(LLM_CONFIG["max_retries"] + 1):
+        if not _breaker_allows_call():
+            raise LLMUnavailable("circuit breaker open")
+        start = time.perf_counter()
+        try:
+            text = _call_with_deadline(client, prompt, model or LLM_CONFIG["model"])
+        except LLMUnavailable:
+            _release_probe()
+            raise
+        except Exception as e:
+            _record_call(False, (time.perf_counter() - start) * 1000)
+            if attempt == LLM_CONFIG["max_retries"] or _breaker_state() == "open":
+                raise
+            print(f"⚠️ LLM call failed ({e}), retry {attempt + 1}/{LLM_CONFIG['max_retries']}")
+            backoff = min(LLM_CONFIG["retry_backoff_max_seconds"], LLM_CONFIG["retry_backoff_seconds"] * 2 ** attempt)
+            time.sleep(random.uniform(0, backoff))
+        else:
+            _record_call(True, (time.perf_counter() - start) * 1000)
+            return text
+
+
+def extract_json(text):
+    """Parse the outermost JSON object in an LLM response, None if there isn't one"""
+    try:
+        start = text.find('{')
+        end = text.rfind('}') + 1
+        if start >= 0 and end > start:
+            return json.loads(text[start:end])
+    except ValueError:
+        pass
+    return None
+
+
+# ==================== CALL GUARDS ====================
+# A bounded semaphore caps calls in flight; each attempt runs on a call
+# thread so the caller can stop waiting at the deadline. A call that
+# overruns keeps its slot until it really returns, so a hung Gemini
+# cannot pile up unbounded threads. The breaker opens after
+# breaker_failure_threshold consecutive failures and lets one probe
+# through (half-open) after breaker_reset_seconds.
+
+class LLMUnavailable(Exception):
+    """The call was not attempted: breaker open or every call slot busy"""
+
+
+_call_slots = threading.BoundedSemaphore(LLM_CONFIG["max_concurrent_calls"])
+_call_executor = ThreadPoolExecutor(max_workers=LLM_CONFIG["max_concurrent_calls"], thread_name_prefix='healflow-llm-call')
+_guard_lock = threading.Lock()
+_breaker = {"state": "closed", "consecutive_failures": 0, "opened_at": None, "probe_in_flight": False, "trips": 0}
+_call_stats = {"calls": 0, "failures": 0, "timeouts": 0, "rejected": 0, "short_circuited": 0,
+               "latency_ms": [0] * (len(LLM_CONFIG["latency_buckets_ms"]) + 1)}
+
+
+def _call_with_deadline(client, prompt, model):
+    if not _call_slots.acquire(timeout=LLM_CONFIG["slot_wait_seconds"]):
+        with _guard_lock:
+            _call_stats["rejected"] += 1
+        raise LLMUnavailable(f"all {LLM_CONFIG['max_concurrent_calls']} LLM call slots busy")
+    
+    def call():
+        try:
+            return client.models.generate_content(model=model, contents=prompt).text
+        finally:
+            _call_slots.release()
+    
+    future = _call_executor.submit(call)
+    try:
+        return future.result(timeout=LLM_CONFIG["call_timeout_seconds"])
+    except FutureTimeout:
+        with _guard_lock:
+            _call_stats["timeouts"] += 1
+        raise TimeoutError(f"LLM call exceeded {LLM_CONFIG['call_timeout_seconds']}s")
+
+
+def _breaker_state():
+    with _guard_lock:
+        if (_breaker["state"] == "open"
+                and time.monotonic() - _breaker["opened_at"] >= LLM_CONFIG["breaker_reset_seconds"]):
+            _breaker["state"] = "half_open"
+        return _breaker["state"]
+
+
+def _breaker_allows_call():
+    """Closed: yes. Open: no. Half-open: only the single probe call."""
+    state = _breaker_state()
+    with _guard_lock:
+        if state == "closed":
+            return True
+        if state == "half_open" and not _breaker["probe_in_flight"]:
+            _breaker["probe_in_flight"] = True
+            return True
+        _call_stats["short_circuited"] += 1
+        return False
+
+
+def _release_probe():
+    """A call that never reached Gemini (no free slot) ends a half-open probe
+    without a verdict: back to open with a fresh reset timer, since busy slots
+    mean earlier calls are still hanging"""
+    with _guard_lock:
+        if _breaker["probe_in_flight"]:
+            _breaker["probe_in_flight"] = False
+            _breaker["state"] = "open"
+            _breaker["opened_at"] = time.monotonic()
+
+
+def _record_call(succeeded, latency_ms):
+    with _guard_lock:
+        _call_stats["calls"] += 1
+        bucket = next((index for index, bound in enumerate(LLM_CONFIG["latency_buckets_ms"]) if latency_ms <= bound),
+                      len(LLM_CONFIG["latency_buckets_ms"]))
+        _call_stats["latency_ms"][bucket] += 1
+        _breaker["probe_in_flight"] = False
+        if succeeded:
+            _breaker["state"] = "closed"
+            _breaker["consecutive_failures"] = 0
+            return
+        _call_stats["failures"] += 1
+        _breaker["consecutive_failures"] += 1
+        if (_breaker["state"] == "half_open"
+                or _breaker["consecutive_failures"] >= LLM_CONFIG["breaker_failure_threshold"]):
+            if _breaker["state"] != "open":
+                _breaker["trips"] += 1
+                print(f"⚠️ LLM circuit breaker open after {_breaker['consecutive_failures']} consecutive failures")
+            _breaker["state"] = "open"
+            _breaker["opened_at"] = time.monotonic()
+
+
+def get_client_stats():
+    """Breaker state, call counters and a latency histogram (per attempt)"""
+    state = _breaker_state()
+    with _guard_lock:
+        bounds = [f"<={bound}" for bound in LLM_CONFIG["latency_buckets_ms"]] + [f">{LLM_CONFIG['latency_buckets_ms'][-1]}"]
+        return {
+            "breaker": {
+                "state": state,
+                "consecutive_failures": _breaker["consecutive_failures"],
+                "trips": _breaker["trips"],
+                "reset_seconds": LLM_CONFIG["breaker_reset_seconds"],
+            },
+            "max_concurrent_calls": LLM_CONFIG["max_concurrent_calls"],
+            **{key: value for key, value in _call_stats.items() if key != "latency_ms"},
+            "latency_ms": dict(zip(bounds, _call_stats["latency_ms"])),
+        }
+
+
+# ==================== RESPONSE CACHE ====================
+
+_cache_lock = threading.Lock()
+_cache_stats = {"hits": 0, "misses": 0, "saved_latency_ms": 0.0, "llm_latency_ms": 0.0}
+
+
+def signal_fingerprint(signal):
+    """The signal fields that shape an LLM answer, normalized so recurring
+    signals (same type on the same endpoint) share cache entries"""
+    metadata = signal.get('metadata') or {}
+    fields = {
+        "type": signal.get('type'),
+        "severity": signal.get('severity'),
+        "source": signal.get('source'),
+        "endpoint": signal.get('endpoint'),
+        "metadata": {key: metadata[key] for key in LLM_CACHE_CONFIG["metadata_keys"] if key in metadata},
+    }
+    return {key: value.strip().lower() if isinstance(value, str) else value
+            for key, value in fields.items()}
+
+
+def _fingerprint_key(kind, fields):
+    raw = json.dumps({"kind": kind, "model": LLM_CONFIG["model"], **fields}, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def generate_cached(kind, fields, prompt, batch=False):
+    """generate_text behind the llm_cache table. kind and fields (e.g.
+    signal_fingerprint) form the cache key; the prompt itself is not part of
+    it, so ids and timestamps in the prompt don't defeat the cache.
+    With batch=True a miss goes through generate_batched."""
+    generate = generate_batched if batch else generate_text
+    if not LLM_CACHE_CONFIG["enabled"]:
+        return generate(prompt)
+    
+    fingerprint = _fingerprint_key(kind, fields)
+    ttl = LLM_CACHE_CONFIG["ttl_overrides"].get(kind, LLM_CACHE_CONFIG["ttl_seconds"])
+    entry = db.get_llm_cache_entry(fingerprint, ttl)
+    if entry:
+        with _cache_lock:
+            _cache_stats["hits"] += 1
+            _cache_stats["saved_latency_ms"] += entry["latency_ms"] or 0
+        return entry["response"]
+    
+    start = time.perf_counter()
+    text = generate(prompt)
+    latency_ms = (time.perf_counter() - start) * 1000
+    db.put_llm_cache_entry(fingerprint, kind, text, latency_ms, LLM_CACHE_CONFIG["max_entries"])
+    with _cache_lock:
+        _cache_stats["misses"] += 1
+        _cache_stats["llm_latency_ms"] += latency_ms
+    return text
+
+
+def get_cache_stats():
+    """Hit rate and latency saved by the response cache in this process,
+    plus what is stored per kind"""
+    with _cache_lock:
+        stats = dict(_cache_stats)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+    stats["saved_latency_ms"] = round(stats["saved_latency_ms"], 1)
+    stats["llm_latency_ms"] = round(stats["llm_latency_ms"], 1)
+    stats["stored"] = db.get_llm_cache_summary()
+    return stats
+
+
+# ==================== MICRO-BATCHING ====================
+# generate_batched hands its prompt to a collector thread, which gathers
+# requests for up to max_wait_ms or max_items and sends them as one prompt
+# asking for a JSON object keyed by request id. Each caller gets back its
+# own item, or BatchItemMissing if the reply left it out.
+
+class BatchItemMissing(Exception):
+    """The batched reply had no usable answer for this request"""
+
+
+_batch_queue = queue.Queue()
+_batch_collector = None
+_batch_executor = None
+_batch_start_lock = threading.Lock()
+_batch_stats = {"batches": 0, "items": 0, "missing_items": 0, "failed_batches": 0}
+
+
+def generate_batched(prompt):
+    """generate_text, merged with concurrent callers into one LLM call.
+    Raises BatchItemMissing if the reply has no answer for this prompt."""
+    if not LLM_BATCH_CONFIG["enabled"]:
+        return generate_text(prompt)
+    _start_batch_collector()
+    item = {"prompt": prompt, "done": threading.Event(), "text": None, "error": None}
+    _batch_queue.put(item)
+    item["done"].wait()
+    if item["error"]:
+        raise item["error"]
+    return item["text"]
+
+
+def _start_batch_collector():
+    global _batch_collector, _batch_executor
+    with _batch_start_lock:
+        if _batch_collector is None:
+            _batch_executor = ThreadPoolExecutor(max_workers=LLM_BATCH_CONFIG["max_concurrent_batches"],
+                                                 thread_name_prefix='healflow-llm-batch')
+            _batch_collector = threading.Thread(target=_batch_collector_loop, name='healflow-llm-collector',
+                                                daemon=True)
+            _batch_collector.start()
+
+
+def _batch_collector_loop():
+    while True:
+        batch = [_batch_queue.get()]
+        deadline = time.monotonic() + LLM_BATCH_CONFIG["max_wait_ms"] / 1000
+        while len(batch) < LLM_BATCH_CONFIG["max_items"]:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_batch_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        _batch_executor.submit(_send_batch, batch)
+
+
+def _batch_prompt(batch):
+    """One prompt carrying every request, answered as {request_id: answer}"""
+    sections = [f"### Request r{index}\n{item['prompt']}" for index, item in enumerate(batch)]
+    return (f"Answer the {len(batch)} independent requests below in a single reply.\n"
+            f"Return one JSON object whose keys are the request ids "
+            f"({', '.join(f'r{index}' for index in range(len(batch)))}) and whose values "
+            f"are the JSON object each request asks for.\n\n" + "\n\n".join(sections))
+
+
+def _send_batch(batch):
+    """Make the LLM call for a batch and hand each caller its answer"""
+    try:
+        if len(batch) == 1:
+            batch[0]["text"] = generate_text(batch[0]["prompt"])
+        else:
+            reply = extract_json(generate_text(_batch_prompt(batch))) or {}
+            for index, item in enumerate(batch):
+                answer = reply.get(f"r{index}") if isinstance(reply, dict) else None
+                if isinstance(answer, dict):
+                    item["text"] = json.dumps(answer)
+                else:
+                    item["error"] = BatchItemMissing(f"request r{index} missing from batch reply")
+        failed = False
+    except Exception as e:
+        failed = True
+        for item in batch:
+            item["error"] = e
+    
+    with _batch_start_lock:
+        _batch_stats["batches"] += 1
+        _batch_stats["items"] += len(batch)
+        _batch_stats["missing_items"] += sum(1 for item in batch if isinstance(item["error"], BatchItemMissing))
+        _batch_stats["failed_batches"] += failed
+    for item in batch:
+        item["done"].set()
+
+
+def get_batch_stats():
+    """Batches sent, items carried and items the replies left out"""
+    with _batch_start_lock:
+        stats = dict(_batch_stats)
+    stats["avg_batch_size"] = round(stats["items"] / stats["batches"], 2) if stats["batches"] else 0.0
+    return stats
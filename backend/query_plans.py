@@ -0,0 +1,66 @@
+"""
+HealFlow Query Plans
+Every signal listing, incident listing, metrics and stale-signal claim
+query shape the API can generate (first pages and keyset continuations),
+and the rule their EXPLAIN QUERY PLAN must pass: no full scan of signals
+or incidents, and no sort where an index should be walked. Checked by
+tests/test_query_plans.py and benchmarks/check_query_plans.py.
+"""
+
+import itertools
+import re
+
+# Filter values the API passes through to database.py
+STATUSES = [None, 'pending', 'processing', 'resolved']
+SEVERITIES = [None, 'CRITICAL', 'SYSTEM']
+TIERS = [None, ['enterprise'], ['enterprise', 'mid_market', 'sme']]
+PHASES = [None, 'all', 'migration']
+TIME_PERIODS = [None, '24h', '7d', '30d']
+# First page, and a page continuing from a keyset cursor
+AFTERS = [None, ('2000-01-01T00:00:00', 'sig_0')]
+
+# A scan of signals or incidents is only acceptable if it reads a covering
+# index, or walks the time index in ORDER BY order (LIMIT stops it early)
+ALLOWED_SCAN = re.compile(r'^SCAN (s|signals|i|incidents) USING '
+                          r'(COVERING INDEX \w+|INDEX idx_(signals_timestamp|incidents_detected_at))$')
+SIGNALS_SCAN = re.compile(r'^SCAN (s|signals|i|incidents)\b')
+
+
+def iter_query_shapes(db):
+    """Yield (label, sql, params) for every generated query shape"""
+    for status, severity, tier, phase, time_period, after in itertools.product(
+            STATUSES, SEVERITIES, TIERS, PHASES, TIME_PERIODS, AFTERS):
+        label = (f"signals status={status} severity={severity} tier={tier} phase={phase} "
+                 f"time_period={time_period} after={after}")
+        yield (label,) + db._build_signals_query(50, status, severity, tier, phase, time_period, after)
+
+    for status, severity, after in itertools.product(
+            [None, 'detected', 'resolved'], [None, 'critical'], AFTERS):
+        label = f"incidents status={status} severity={severity} after={after}"
+        yield (label,) + db._build_incidents_query(50, status, severity, after)
+
+    for tier, phase, time_period in itertools.product(TIERS, PHASES, TIME_PERIODS):
+        for name, (sql, params) in db._build_metrics_queries(tier, phase, time_period).items():
+            yield (f"metrics.{name} tier={tier} phase={phase} time_period={time_period}", sql, params)
+
+    for status in ('pending', 'processing'):
+        yield (f"stale signal claim status={status}", db._CLAIMABLE_SIGNALS_SQL,
+               (status, '2000-01-01T00:00:00', '2000-01-01T00:00:00', 100))
+
+
+def check_plan(plan):
+    """Return the offending plan lines, empty if the plan is acceptable"""
+    problems = []
+    for detail in plan:
+        if SIGNALS_SCAN.match(detail) and not ALLOWED_SCAN.match(detail):
+            problems.append(detail)
+        if detail.startswith('USE TEMP B-TREE FOR') and 'ORDER BY' in detail:
+            problems.append(detail)
+    return problems
+
+
+def iter_plans(db):
+    """Yield (label, plan, problems) for every generated query shape"""
+    for label, sql, params in iter_query_shapes(db):
+        plan = db.explain_query_plan(sql, params)
+        yield label, plan, check_plan(plan)
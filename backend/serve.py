@@ -0,0 +1,107 @@
+"""
+HealFlow Production Server
+Serves the Flask app with gunicorn: several worker processes with a pool of
+request threads each, every thread holding its own SQLite connection
+(database.get_connection). The database is initialized once in the master
+before forking. Exactly one worker process runs the background tasks
+(heartbeat and embedded auto-resolution workers): the one holding an
+exclusive lock on a file next to the database. If it exits, the kernel
+drops the lock and a waiting worker takes over.
+Shared state lives in SQLite: ETag versions (change_versions) and job records
+(jobs.py), so any worker can answer a request. A job still runs in the worker
+that accepted it and is not resumed if that worker exits.
+
+Usage: python serve.py [--bind 0.0.0.0:5000] [--workers 4] [--threads 8]
+app.py's app.run() remains the development server.
+"""
+
+import argparse
+import fcntl
+import os
+import threading
+
+from gunicorn.app.base import BaseApplication
+
+import database as db
+import llm
+import workers
+from app import app, start_background_tasks
+from config import SERVER_CONFIG
+
+# Open (and flock-ed) for the life of the elected process
+_background_lock = None
+
+
+def _elect_background_leader(lock_path):
+    """Block until this process holds the lock, then start the background
+    tasks. Every worker waits here in a daemon thread; only one gets through
+    at a time."""
+    global _background_lock
+    lock_file = open(lock_path, 'a')
+    fcntl.flock(lock_file, fcntl.LOCK_EX)
+    _background_lock = lock_file
+    print(f"🤖 Worker {os.getpid()} holds {lock_path} and runs the background tasks")
+    start_background_tasks()
+
+
+def post_worker_init(worker):
+    """gunicorn hook, in each worker process after fork"""
+    lock_path = db.DATABASE_PATH + SERVER_CONFIG['background_lock_suffix']
+    threading.Thread(target=_elect_background_leader, args=(lock_path,),
+                     name='healflow-background-election', daemon=True).start()
+
+
+def worker_exit(server, worker):
+    """gunicorn hook: let auto-resolution workers finish their current tick"""
+    workers.stop(timeout=SERVER_CONFIG['graceful_timeout_seconds'])
+
+
+class HealFlowServer(BaseApplication):
+    """gunicorn application serving app.app with options from SERVER_CONFIG"""
+
+    def __init__(self, options):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        return app
+
+
+def main():
+    default_bind = f"{SERVER_CONFIG['host']}:{os.getenv('HEALFLOW_PORT') or SERVER_CONFIG['port']}"
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--bind', default=default_bind)
+    parser.add_argument('--workers', type=int, default=SERVER_CONFIG['workers'])
+    parser.add_argument('--threads', type=int, default=SERVER_CONFIG['threads'])
+    parser.add_argument('--access-log', action='store_true', help="log every request to stdout")
+    args = parser.parse_args()
+
+    print("\n🚀 HealFlow Backend Starting (production)...")
+    print(f"   Gemini AI: {'✅ Enabled (loads on first use)' if llm.is_configured() else '⚠️ Disabled'} [backend: {llm.LLM_BACKEND}]")
+    print(f"   Database: {db.DATABASE_PATH}")
+    print(f"   Serving on {args.bind}: {args.workers} processes x {args.threads} threads")
+
+    # Schema, seeding and the data clock update run once, here; workers
+    # inherit the initialized state but not the master's connection
+    db.ensure_initialized()
+    db.close_connection()
+
+    HealFlowServer({
+        "bind": args.bind,
+        "workers": args.workers,
+        "threads": args.threads,
+        "worker_class": "gthread",
+        "timeout": SERVER_CONFIG['timeout_seconds'],
+        "graceful_timeout": SERVER_CONFIG['graceful_timeout_seconds'],
+        "accesslog": "-" if args.access_log else None,
+        "post_worker_init": post_worker_init,
+        "worker_exit": worker_exit,
+    }).run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Query plan regression tests: every query shape in query_plans.py must read
+signals and incidents through an index, against a freshly initialized
+temporary database.
+
+Usage: python -m pytest tests/
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from query_plans import check_plan, iter_plans
+
+
+@pytest.fixture(scope='module')
+def db(tmp_path_factory):
+    """database.py pointed at an empty temporary file, initialized"""
+    previous = os.environ.get('HEALFLOW_DB_PATH')
+    os.environ['HEALFLOW_DB_PATH'] = str(tmp_path_factory.mktemp('healflow') / 'healflow.db')
+    try:
+        import database
+        assert database.DATABASE_PATH == os.environ['HEALFLOW_DB_PATH'], "database imported before the fixture"
+        database.ensure_initialized()
+        yield database
+        database.close_connection()
+    finally:
+        if previous is None:
+            del os.environ['HEALFLOW_DB_PATH']
+        else:
+            os.environ['HEALFLOW_DB_PATH'] = previous
+
+
+def test_check_plan_flags_full_scans_and_sorts():
+    assert check_plan(['SCAN signals']) == ['SCAN signals']
+    assert check_plan(['SCAN s', 'USE TEMP B-TREE FOR ORDER BY']) == ['SCAN s', 'USE TEMP B-TREE FOR ORDER BY']
+    assert check_plan(['SCAN s USING INDEX idx_signals_timestamp']) == []
+    assert check_plan(['SCAN i USING COVERING INDEX idx_incidents_status']) == []
+    assert check_plan(['SEARCH s USING INDEX idx_signals_status (status=?)']) == []
+
+
+def test_query_shapes_use_indexes(db):
+    checked = 0
+    failures = []
+    for label, plan, problems in iter_plans(db):
+        checked += 1
+        if problems:
+            failures.append(f"{label}: {'; '.join(problems)}")
+    assert checked
+    assert not failures, "\n".join(failures)
@@ -0,0 +1,164 @@
+"""
+HealFlow Auto-Resolution Workers
+Workers lease stale signals from the database (claimed_by, lease_expires_at),
+resolve them while a heartbeat renews the lease, and complete only what they
+still hold. Coordination lives entirely in SQLite, so workers can run as
+threads in every app process and as extra processes on any host sharing
+the database; throughput scales with the worker count and no signal is
+resolved twice.
+
+Usage: python workers.py [--threads 4]
+"""
+
+import argparse
+import os
+import socket
+import threading
+import time
+from datetime import datetime
+
+import database as db
+from config import WORKER_CONFIG
+
+_stop = threading.Event()
+_threads = []
+_stats = {}
+_lock = threading.Lock()
+
+
+def default_resolution(signal):
+    """Resolution note recorded on an auto-resolved signal"""
+    if signal.get('severity') == 'CRITICAL':
+        return WORKER_CONFIG['resolution'] + " (Emergency Protocol)"
+    return WORKER_CONFIG['resolution']
+
+
+def _worker_id(index):
+    """Unique across hosts and processes sharing the database"""
+    return f"{socket.gethostname()}:{os.getpid()}:{index}"
+
+
+def run_once(worker_id, resolve=default_resolution):
+    """One claim/resolve/complete cycle. Returns the tick's counters."""
+    start = time.perf_counter()
+    signals, reclaimed = db.claim_stale_signals(worker_id, WORKER_CONFIG['batch_size'], WORKER_CONFIG['lease_seconds'])
+    held = {signal['id'] for signal in signals}
+    resolutions = {}
+
+    # Keep the leases alive while resolve() runs; ids that come back
+    # missing were reclaimed by another worker and are skipped. A failed
+    # renewal is logged and retried on the next beat, until done is set.
+    done = threading.Event()
+    renew_failures = []
+    def heartbeat():
+        while not done.wait(WORKER_CONFIG['heartbeat_seconds']):
+            try:
+                held.intersection_update(db.renew_signal_leases(worker_id, list(held), WORKER_CONFIG['lease_seconds']))
+            except Exception as e:
+                renew_failures.append(e)
+                print(f"⚠️ Worker {worker_id} could not renew its leases: {e}")
+    heartbeat_thread = threading.Thread(target=heartbeat, name=f"{worker_id}-heartbeat", daemon=True)
+    if signals:
+        heartbeat_thread.start()
+
+    failed = []
+    try:
+        for signal in signals:
+            if signal['id'] not in held:
+                continue
+            try:
+                resolutions[signal['id']] = resolve(signal)
+            except Exception as e:
+                print(f"Worker {worker_id} could not resolve {signal['id']}: {e}")
+                failed.append(signal['id'])
+    finally:
+        done.set()
+        if signals:
+            heartbeat_thread.join()
+
+    db.release_signal_leases(worker_id, failed)
+    completed = db.complete_claimed_signals(worker_id, resolutions) if resolutions else []
+    return {
+        "claimed": len(signals),
+        "reclaimed": reclaimed,
+        "resolved": len(completed),
+        "lost": len(signals) - len(completed) - len(failed),
+        "failed": len(failed),
+        "renew_failed": len(renew_failures),
+        "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+    }
+
+
+def _worker_loop(worker_id, resolve):
+    while not _stop.is_set():
+        try:
+            tick = run_once(worker_id, resolve)
+        except Exception as e:
+            print(f"Worker {worker_id} error: {e}")
+            tick = None
+
+        if tick:
+            with _lock:
+                stats = _stats[worker_id]
+                stats["ticks"] += 1
+                for key in ("claimed", "reclaimed", "resolved", "lost", "failed", "renew_failed"):
+                    stats[key] += tick[key]
+                stats["last_tick"] = {"at": datetime.utcnow().isoformat(), **tick}
+            if tick["resolved"]:
+                print(f"🤖 {worker_id} auto-resolved {tick['resolved']} stale signals in {tick['duration_ms']}ms")
+        # A full batch means there is probably more waiting
+        if not tick or tick["claimed"] < WORKER_CONFIG['batch_size']:
+            _stop.wait(WORKER_CONFIG['interval_seconds'])
+
+
+def start(count=None, resolve=default_resolution):
+    """Start count worker threads in this process (once; later calls are no-ops)"""
+    with _lock:
+        if _threads:
+            return
+        _stop.clear()
+        for index in range(count or WORKER_CONFIG['threads']):
+            worker_id = _worker_id(index)
+            _stats[worker_id] = {"ticks": 0, "claimed": 0, "reclaimed": 0, "resolved": 0, "lost": 0,
+                                 "failed": 0, "renew_failed": 0, "last_tick": None}
+            thread = threading.Thread(target=_worker_loop, args=(worker_id, resolve),
+                                      name=f"healflow-worker-{index}", daemon=True)
+            thread.start()
+            _threads.append(thread)
+    print(f"🤖 Started {len(_threads)} auto-resolution workers")
+
+
+def stop(timeout=None):
+    """Stop this process's workers after their current tick"""
+    _stop.set()
+    with _lock:
+        threads = list(_threads)
+        _threads.clear()
+    for thread in threads:
+        thread.join(timeout)
+
+
+def get_stats():
+    """This process's workers and the shared stale-signal backlog"""
+    with _lock:
+        workers = {worker_id: dict(stats) for worker_id, stats in _stats.items()}
+    return {"workers": workers, "backlog": db.get_stale_backlog()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--threads', type=int, default=WORKER_CONFIG['threads'])
+    args = parser.parse_args()
+
+    db.ensure_initialized()
+    start(args.threads)
+    try:
+        while True:
+            time.sleep(60)
+            print(f"   backlog: {db.get_stale_backlog()}")
+    except KeyboardInterrupt:
+        stop()
+
+
+if __name__ == '__main__':
+    main()
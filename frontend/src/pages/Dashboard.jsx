@@ -30,13 +30,30 @@ function Dashboard() {
     tiers: ['enterprise', 'mid_market', 'sme']
   });
 
-  // Initialize data
+  // Always call the latest loadData (it closes over filters/activeOODA)
+  const loadDataRef = useRef(null);
+
+  // Initialize data, and reload whenever filters change
   useEffect(() => {
-    loadData();
+    loadDataRef.current();
+  }, [filters]);
+
+  useEffect(() => {
+    // Refresh when the backend pushes a change instead of polling.
+    // Bursts of events are coalesced into a single reload.
+    let pending = null;
+    const unsubscribe = api.subscribeToStream(() => {
+      if (pending) return;
+      pending = setTimeout(() => {
+        pending = null;
+        loadDataRef.current();
+      }, 250);
+    });
     
-    // Poll for updates every 3 seconds
-    const interval = setInterval(loadData, 3000);
-    return () => clearInterval(interval);
+    return () => {
+      unsubscribe();
+      if (pending) clearTimeout(pending);
+    };
   }, []);
 
   const loadData = useCallback(async () => {
@@ -49,16 +66,13 @@ function Dashboard() {
         time_period: filters.timePeriod
       };
 
-      const [metricsData, statusData, signalsData, agentsData, hilData] = await Promise.all([
-        api.getMetrics(signalParams).catch(() => null),
-        api.getSystemStatus().catch(() => null),
-        api.getSignals(signalParams).catch(() => ({ data: [] })),
-        api.getAgents().catch(() => ({ data: [] })),
-        api.getHILRequests().catch(() => ({ data: [] })),
-      ]);
+      const snapshot = await api.getDashboardSnapshot(signalParams);
+      const signalsData = snapshot.signals || { data: [] };
+      const agentsData = snapshot.agents || { data: [] };
+      const hilData = snapshot.hil_requests || { data: [] };
 
-      setMetrics(metricsData);
-      setSystemStatus(statusData);
+      setMetrics(snapshot.metrics);
+      setSystemStatus(snapshot.system_status);
       setSignals(signalsData.data || []);
       setAgents(agentsData.data || []);
       setHilRequests(hilData.data || []);
@@ -80,6 +94,7 @@ function Dashboard() {
       setLoading(false);
     }
   }, [activeOODA, filters]); // Reload when filters change
+  loadDataRef.current = loadData;
 
   const handleFilterChange = (key, value) => {
     setFilters(prev => ({ ...prev, [key]: value }));
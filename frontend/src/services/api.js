@@ -66,6 +66,14 @@ export async function getMetricsHistory(period = "day", limit = 24) {
   return fetchApi(`/system/metrics/history?period=${period}&limit=${limit}`);
 }
 
+// ==================== Dashboard ====================
+
+// Metrics, status, signals, agents and HIL queue in one consistent response
+export async function getDashboardSnapshot(params = {}) {
+  const query = new URLSearchParams(params).toString();
+  return fetchApi(`/dashboard/snapshot${query ? `?${query}` : ""}`);
+}
+
 // ==================== Signals ====================
 
 export async function getSignals(params = {}) {
@@ -123,6 +131,29 @@ export async function advanceOODAStep(processId) {
   });
 }
 
+// Runs the step on the server's job pool; resolves to { job } right away.
+// Completion arrives as a job.succeeded / job.failed stream event.
+export async function advanceOODAStepAsync(processId) {
+  return fetchApi("/ooda/step", {
+    method: "POST",
+    body: JSON.stringify({ process_id: processId, async: true }),
+  });
+}
+
+// All remaining stages from one LLM call, recorded together
+export async function runOODAPipeline(processId, { async = false } = {}) {
+  return fetchApi("/ooda/run", {
+    method: "POST",
+    body: JSON.stringify({ process_id: processId, async }),
+  });
+}
+
+// ==================== Jobs ====================
+
+export async function getJob(jobId) {
+  return fetchApi(`/jobs/${jobId}`);
+}
+
 // ==================== HIL Requests ====================
 
 export async function getHILRequests(status = "pending") {
@@ -200,6 +231,37 @@ export async function getAuditLog(limit = 100) {
   return fetchApi(`/audit-log?limit=${limit}`);
 }
 
+// ==================== Live Stream ====================
+
+export const STREAM_EVENTS = [
+  "signal.created",
+  "signal.updated",
+  "agent.updated",
+  "hil_request.created",
+  "hil_request.resolved",
+  "job.succeeded",
+  "job.failed",
+  "reset",
+];
+
+// Subscribe to the Server-Sent Events feed. EventSource reconnects on its
+// own and resumes from the last received event id. Returns an unsubscribe fn.
+export function subscribeToStream(onEvent, onError) {
+  const source = new EventSource(`${API_BASE}/stream`);
+
+  STREAM_EVENTS.forEach((type) => {
+    source.addEventListener(type, (event) => {
+      onEvent(type, JSON.parse(event.data));
+    });
+  });
+
+  if (onError) {
+    source.onerror = onError;
+  }
+
+  return () => source.close();
+}
+
 // ==================== Health ====================
 
 export async function healthCheck() {